@@ -18,17 +18,54 @@ VVWWXYYZ??\
 
 BLANK = "?"
 
+# Racks are strings, but while fitting words they're counted into a list of
+# RACK_SLOTS counts: one per letter (0 for A) and the last for blanks.
+BLANK_SLOT = 26
+RACK_SLOTS = BLANK_SLOT + 1
+
+def get_slot(ch):
+    """Returns the slot of the tile in a rack count list."""
+
+    return BLANK_SLOT if ch == BLANK else ord(ch) - ord("A")
+
+def get_rack_counts(rack):
+    """Returns the list of the number of each tile in the rack, by slot."""
+
+    counts = [0]*RACK_SLOTS
+    for ch in rack:
+        counts[get_slot(ch)] += 1
+
+    return counts
+
+def get_rack_indices(rack, slots):
+    """Given the slots of tiles taken from the rack (see get_rack_counts()), returns
+    the indices within "rack" of those tiles, each letter's tiles being taken from
+    left to right."""
+
+    # Index in "rack" from which to look for the next tile of each slot.
+    starts = [0]*RACK_SLOTS
+
+    indices = []
+    for slot in slots:
+        ch = BLANK if slot == BLANK_SLOT else chr(ord("A") + slot)
+        index = rack.index(ch, starts[slot])
+        starts[slot] = index + 1
+        indices.append(index)
+
+    return indices
+
 def get_full_bag():
     """Returns a list of letters in the whole bag."""
 
     return list(LETTERS)
 
-def generate_rack(rack, bag):
+def generate_rack(rack, bag, rng=random):
     """Given an existing rack (string) and a bag (list of letters), returns a new
-    rack with a full 7 letters. The bag is modified in-place to remove the letters."""
+    rack with a full 7 letters. The bag is modified in-place to remove the letters.
+    Pass a random.Random object as "rng" to get reproducible racks."""
 
     # Put random letters at the front.
-    random.shuffle(bag)
+    rng.shuffle(bag)
 
     # Figure out how many letters we need.
     needed_letters = 7 - len(rack)
@@ -39,6 +76,4 @@ def generate_rack(rack, bag):
     # Remove from the bag.
     del bag[:needed_letters]
 
-    print "Rack: %s" % rack
-
     return rack
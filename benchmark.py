@@ -0,0 +1,191 @@
+#!/usr/bin/python
+
+# Copyright 2011 Lawrence Kesteloot
+
+"""Times the hot paths of the engine on a fixed corpus of positions. Run with:
+
+    % python benchmark.py --output baseline.json
+
+and later, to flag benchmarks that got slower than the baseline:
+
+    % python benchmark.py --compare baseline.json
+
+Each benchmark is run a few times to warm up and then timed over several
+repetitions. The results file is JSON with the minimum, median, and mean time
+of each benchmark in seconds. Exits with status 1 if any benchmark regressed."""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from board import Board, GENERATOR_SUBSETS, GENERATOR_DAWG, GENERATOR_NUMPY
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+import numpy_fit
+import numpy_score
+
+DICTIONARY_FILENAME = "dictionary"
+
+# Moves of a seeded self-play game, as (word, row, col, direction, word_blank_indices).
+# The positions below are prefixes of this game.
+GAME = [
+    ("PAEAN", 7, 3, HORIZONTAL, []),
+    ("RIBANDS", 4, 4, VERTICAL, [1]),
+    ("GUANINE", 8, 6, HORIZONTAL, []),
+    ("PIE", 7, 12, HORIZONTAL, []),
+    ("QAID", 9, 1, HORIZONTAL, []),
+    ("KAROO", 8, 2, VERTICAL, []),
+    ("MY", 11, 3, VERTICAL, []),
+    ("BOW", 6, 4, HORIZONTAL, []),
+    ("ODYL", 9, 11, HORIZONTAL, []),
+    ("LAZIER", 9, 14, VERTICAL, []),
+    ("FILISTER", 14, 7, HORIZONTAL, [5]),
+    ("JOULE", 0, 3, VERTICAL, []),
+    ("OUTDRAG", 2, 2, HORIZONTAL, []),
+    ("DEAFEN", 0, 7, VERTICAL, []),
+    ("MHO", 11, 1, VERTICAL, []),
+    ("NERVULE", 4, 6, HORIZONTAL, []),
+    ("GEEZ", 11, 11, HORIZONTAL, []),
+    ("CITE", 13, 6, HORIZONTAL, []),
+]
+
+# The corpus: name, number of moves of GAME on the board, and rack.
+POSITIONS = [
+    ("empty", 0, "AENANRP"),
+    ("opening", 1, "NRNBDSE"),
+    ("midgame", 8, "IIODRYL"),
+    ("crowded", 18, "ITBAOST"),
+    ("one_blank", 8, "IIOD?YL"),
+    ("two_blanks", 8, "IIO??YL"),
+]
+
+# Generators to time.
+GENERATORS = [GENERATOR_SUBSETS, GENERATOR_DAWG]
+if numpy_fit.is_available():
+    GENERATORS.append(GENERATOR_NUMPY)
+
+def make_board(move_count):
+    """Returns a board with the first "move_count" moves of GAME played."""
+
+    board = Board()
+    for word, row, col, direction, word_blank_indices in GAME[:move_count]:
+        board.add_word(word, row, col, direction, word_blank_indices)
+
+    return board
+
+def measure(function, warmup, repeat):
+    """Call the function "warmup" times, then time it "repeat" times. Returns a dict
+    of statistics in seconds."""
+
+    for i in range(warmup):
+        function()
+
+    times = []
+    for i in range(repeat):
+        before = time.time()
+        function()
+        times.append(time.time() - before)
+
+    times.sort()
+    return {
+        "min": times[0],
+        "median": times[len(times)//2],
+        "mean": sum(times)/len(times),
+        "repeat": repeat,
+    }
+
+def get_benchmarks(dictionary_filename):
+    """Returns a list of (name, function) for the whole suite. The dictionary is
+    loaded here so that the benchmarks don't include it."""
+
+    dictionary = Dictionary.load(dictionary_filename)
+    dictionary.get_dawg()
+
+    benchmarks = [("load", lambda: Dictionary.load(dictionary_filename))]
+
+    for name, move_count, rack in POSITIONS:
+        board = make_board(move_count)
+        for generator in GENERATORS:
+            benchmarks.append(("generate/%s/%s" % (generator, name),
+                lambda board=board, rack=rack, generator=generator:
+                    board.generate_solutions(rack, dictionary, generator)))
+
+        solutions = board.generate_solutions(rack, dictionary)
+
+        benchmarks.append(("find_best/%s" % name,
+            lambda board=board, solutions=solutions:
+                board.find_best_solution(solutions, dictionary)))
+
+        def score_all(board=board, solutions=solutions):
+            for solution in solutions:
+                solution.determine_score(board, dictionary)
+        benchmarks.append(("determine_score/%s" % name, score_all))
+
+        if numpy_fit.is_available():
+            candidates = [solution.get_candidate() for solution in solutions]
+            benchmarks.append(("score_batched/%s" % name,
+                lambda board=board, candidates=candidates:
+                    numpy_score.BatchScorer(board, dictionary).score(candidates)))
+
+    return benchmarks
+
+def compare(results, baseline, threshold):
+    """Returns a list of (name, baseline median, current median) for the benchmarks
+    that are more than "threshold" (a fraction) slower than in the baseline."""
+
+    regressions = []
+    for name, result in sorted(results.iteritems()):
+        if name in baseline:
+            before = baseline[name]["median"]
+            after = result["median"]
+            if after > before*(1 + threshold):
+                regressions.append((name, before, after))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine.")
+    parser.add_argument("--output", default="bench_output.json",
+            help="file to write results to")
+    parser.add_argument("--compare", metavar="BASELINE",
+            help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+            help="slowdown (as a fraction) that counts as a regression")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs")
+    parser.add_argument("--filter", default="",
+            help="only run benchmarks whose name contains this")
+    parser.add_argument("--dictionary", default=DICTIONARY_FILENAME,
+            help="dictionary file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, function in get_benchmarks(args.dictionary):
+        if args.filter in name:
+            results[name] = measure(function, args.warmup, args.repeat)
+            print "%-32s %8.4fs median %8.4fs min" % (name,
+                    results[name]["median"], results[name]["min"])
+
+    f = open(args.output, "w")
+    json.dump({
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }, f, indent=2, sort_keys=True)
+    f.close()
+    print "Wrote %s" % args.output
+
+    if args.compare:
+        baseline = json.load(open(args.compare))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print "REGRESSION %-32s %8.4fs -> %8.4fs (%+.0f%%)" % (name, before, after,
+                    (after/before - 1)*100)
+        if regressions:
+            sys.exit(1)
+        print "No regressions against %s" % args.compare
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,20 @@
 
 """Keeps track of the board during a game and provides functions for finding solutions."""
 
+import collections
+import heapq
+import itertools
+import random
 import re
 import time
 
 from direction import DIRECTIONS
-from solution import Solution
-from bag import BLANK
+from solution import Solution, LETTER_SCORE, LETTER_BITS, ALL_LETTERS, SCRABBLE_BONUS, \
+        get_candidate_placement, get_candidate_score, get_mask
+from bag import BLANK, BLANK_SLOT, get_rack_counts, get_rack_indices
+import instrumentation
+import numpy_fit
+import numpy_score
 from board_exceptions import BoardError, OutsideError, TooManyBlanksError, InvalidPremiumError, MismatchLetterError
 
 # Premium cells.
@@ -39,6 +47,22 @@ T . . d . . . T . . . d . . T
 # Row-major order.
 PREMIUM_CELLS = re.sub(r"\s", "", PREMIUM_CELLS)
 
+# ASCII code of the first letter, for indexing tables by letter.
+ORD_A = ord("A")
+
+# Seed of the random keys of the Zobrist hash. Fixed so that a board has the same
+# hash in every process.
+ZOBRIST_SEED = 0
+_zobrist_random = random.Random(ZOBRIST_SEED)
+
+# Move generators that can be passed to Board.generate_solutions().
+#    GENERATOR_SUBSETS = look up every subset of the available letters.
+#    GENERATOR_DAWG = extend left and right from anchor squares using a word graph.
+#    GENERATOR_NUMPY = same as GENERATOR_SUBSETS but fit words with NumPy (optional).
+GENERATOR_SUBSETS = "subsets"
+GENERATOR_DAWG = "dawg"
+GENERATOR_NUMPY = "numpy"
+
 class Board(object):
     """Stores a board during a game."""
 
@@ -52,12 +76,60 @@ class Board(object):
     # Number of squares on the board.
     CELL_COUNT = SIZE*SIZE
 
+    # Index of the center square.
+    MID_INDEX = MID_ROW*SIZE + MID_COL
+
+    # The index of each square, by direction index, line (row or column), and
+    # position along the line.
+    LINE_INDICES = [
+        [[line*SIZE + pos for pos in range(SIZE)] for line in range(SIZE)],
+        [[pos*SIZE + line for pos in range(SIZE)] for line in range(SIZE)],
+    ]
+
+    # Bitboard with a bit set for each position along a line.
+    FULL_LINE = (1 << SIZE) - 1
+
+    # The letter and word multipliers of each square.
+    LETTER_MULTIPLIERS = [{"d": 2, "t": 3}.get(ch, 1) for ch in PREMIUM_CELLS]
+    WORD_MULTIPLIERS = [{"D": 2, "T": 3}.get(ch, 1) for ch in PREMIUM_CELLS]
+
+    # Random 64-bit keys for the Zobrist hash, by square index and tile: 0 to 25 for
+    # the letters, 26 to 51 for blanks standing for them. The hash of a board is
+    # the XOR of the keys of its tiles.
+    ZOBRIST_KEYS = [[_zobrist_random.getrandbits(64) for tile in range(52)]
+            for index in range(CELL_COUNT)]
+
     def __init__(self):
-        # Row-major order. None for empty cell.
-        self.cells = [None] * self.CELL_COUNT
+        # Row-major order. The ASCII code of the letter on each square, or 0 for an
+        # empty square.
+        self.cells = bytearray(self.CELL_COUNT)
 
-        # Row-major order. Whether the tile was a blank when the tile was played.
-        self.is_blank = [False] * self.CELL_COUNT
+        # Bit "index" is set if the tile on that square was a blank when it was played.
+        self.blanks = 0
+
+        # Occupancy bitboards, indexed by direction index and then line (row for
+        # horizontal, column for vertical). Bit "pos" is set if the square at that
+        # position along the line has a tile.
+        self.occupancy = [[0] * self.SIZE for direction in DIRECTIONS]
+
+        # Zobrist hash of the tiles on the board (see ZOBRIST_KEYS), kept up to date
+        # by add_word(). Boards with the same tiles have the same hash.
+        self.hash = 0
+
+        # Cross-checks, indexed by direction index and then square index. For each empty
+        # square, the set of letters (see LETTER_BITS) that a word in that direction
+        # can put there without making an illegal perpendicular word.
+        self.cross_checks = [[ALL_LETTERS] * self.CELL_COUNT for direction in DIRECTIONS]
+
+        # Same indexing as cross_checks. For each empty square, the score of the tiles
+        # in the perpendicular word that a letter put there would join, or None if there
+        # are no such tiles.
+        self.cross_scores = [[None] * self.CELL_COUNT for direction in DIRECTIONS]
+
+        # The dictionary the cross-checks were computed with, and the indices of the
+        # squares whose cross-checks are out of date.
+        self.cross_check_dictionary = None
+        self.dirty_cross_checks = set()
 
     def clone(self):
         """Returns a clone of this board. The clone does not share any data
@@ -65,9 +137,24 @@ class Board(object):
 
         board = Board()
         board.cells = self.cells[:]
-        board.is_blank = self.is_blank[:]
+        board.blanks = self.blanks
+        board.occupancy = [occupancy[:] for occupancy in self.occupancy]
+        board.hash = self.hash
+        board.cross_checks = [cross_checks[:] for cross_checks in self.cross_checks]
+        board.cross_scores = [cross_scores[:] for cross_scores in self.cross_scores]
+        board.cross_check_dictionary = self.cross_check_dictionary
+        board.dirty_cross_checks = set(self.dirty_cross_checks)
         return board
 
+    def __getstate__(self):
+        """Pickle everything but the dictionary the cross-checks were computed with.
+        Whoever unpickles the board must set cross_check_dictionary to a dictionary
+        with the same words to keep using the cross-checks, or they'll be recomputed."""
+
+        state = self.__dict__.copy()
+        state["cross_check_dictionary"] = None
+        return state
+
     @classmethod
     def get_index(cls, row, col):
         """Given the row and column of a square (0-based), returns the index into the
@@ -80,31 +167,50 @@ class Board(object):
         """Return the letter multiplier (e.g, double and triple letter score)
         for the given square."""
 
-        ch = PREMIUM_CELLS[index]
-        if ch == "d":
-            return 2
-        elif ch == "t":
-            return 3
-        else:
-            return 1
+        return Board.LETTER_MULTIPLIERS[index]
 
     @staticmethod
     def get_word_multiplier(index):
         """Return the word multiplier (e.g, double and triple word score)
         for the given square."""
 
-        ch = PREMIUM_CELLS[index]
-        if ch == "D":
-            return 2
-        elif ch == "T":
-            return 3
-        else:
-            return 1
+        return Board.WORD_MULTIPLIERS[index]
+
+    def get_letter(self, index):
+        """Returns the letter on the square, or None if it's empty."""
+
+        code = self.cells[index]
+        return chr(code) if code else None
+
+    def is_blank(self, index):
+        """Whether the tile on the square was a blank when it was played."""
+
+        return bool(self.blanks >> index & 1)
+
+    def get_zobrist_key(self, index):
+        """Returns the Zobrist key of the tile on the square, which must not be empty."""
+
+        tile = self.cells[index] - ORD_A
+        if self.blanks >> index & 1:
+            tile += 26
+
+        return self.ZOBRIST_KEYS[index][tile]
+
+    def compute_hash(self):
+        """Returns the Zobrist hash of the board computed from scratch. Should always
+        be the same as the "hash" field."""
+
+        board_hash = 0
+        for index in range(self.CELL_COUNT):
+            if self.cells[index]:
+                board_hash ^= self.get_zobrist_key(index)
+
+        return board_hash
 
     def is_empty(self):
         """Whether the whole board is empty. We only check the middle cell since the first
         word must go through it."""
-        return not self.cells[self.get_index(self.MID_ROW, self.MID_COL)]
+        return not self.cells[self.MID_INDEX]
 
     def add_word(self, word, row, col, direction, word_blank_indices=None):
         """Add the given word at the location and direction. If
@@ -121,13 +227,30 @@ class Board(object):
             index = self.get_index(row, col)
 
             # Double-check that word can fit here.
-            if not (self.cells[index] is None or self.cells[index] == ch):
+            code = self.cells[index]
+            if code and code != ord(ch):
                 raise MismatchLetterError()
-            added_indices.append((word_index, row, col, index, ch, self.cells[index] is None))
-            self.cells[index] = ch
+            added_indices.append((word_index, row, col, index, ch, not code))
+            if code:
+                self.hash ^= self.get_zobrist_key(index)
+            self.cells[index] = ord(ch)
+            self.occupancy[0][row] |= 1 << col
+            self.occupancy[1][col] |= 1 << row
             if word_blank_indices and word_index in word_blank_indices:
-                self.is_blank[index] = True
-            row, col = direction.increment(row, col)
+                self.blanks |= 1 << index
+            self.hash ^= self.get_zobrist_key(index)
+            row += direction.drow
+            col += direction.dcol
+
+        # The cross-checks of the new tiles' squares and of the squares at either end
+        # of their rows and columns have changed.
+        for word_index, row, col, index, ch, is_new in added_indices:
+            if is_new:
+                self.dirty_cross_checks.add(index)
+                for other_direction in DIRECTIONS:
+                    self.dirty_cross_checks.add(self.find_end(row, col, other_direction, -1))
+                    self.dirty_cross_checks.add(self.find_end(row, col, other_direction, 1))
+        self.dirty_cross_checks.discard(None)
 
         return added_indices
 
@@ -145,273 +268,1111 @@ class Board(object):
         a list of indices within "rack" that were used). If it cannot fit,
         returns (-1, None, None)."""
 
-        # Number of tiles from "rack" that were used.
-        rack_used_count = 0
+        pos, line = direction.get_line_position(row, col)
+        if pos + len(word) > self.SIZE:
+            return -1, None, None
+
+        line_indices = self.LINE_INDICES[direction.index][line]
+        fit = self.fit_word(word, get_rack_counts(rack), line_indices, pos)
+        if fit is None:
+            return -1, None, None
+
+        slots, word_blank_indices = fit
+        return len(slots), word_blank_indices, get_rack_indices(rack, slots)
+
+    def fit_word(self, word, rack_counts, line_indices, pos):
+        """Same as try_word() for the word at position "pos" of the line with the
+        squares "line_indices", which it must fit in, and a rack given as a list of
+        counts (see get_rack_counts()). If it can fit, returns a tuple of the list of
+        the slots of the rack tiles used, in word order, and the list of indices
+        within "word" where a blank was used. Otherwise returns None. The counts are
+        left as they were."""
+
+        cells = self.cells
+
+        # Slots of the tiles taken from the rack.
+        slots = []
 
         # Indices within "word" where a blank was used.
         word_blank_indices = []
 
-        # Indices within "rack" that were used.
-        rack_used_indices = []
-
         # Try each letter of the word.
+        fits = True
         for word_index, ch in enumerate(word):
-            if col >= self.SIZE:
-                return -1, None, None
-            if row >= self.SIZE:
-                return -1, None, None
-            index = self.get_index(row, col)
-            cell = self.cells[index]
-            if cell is None:
-                # If the cell is empty, then we must use a letter from the rack.
-                rack_index = rack.find(ch)
-                if rack_index >= 0:
-                    # We have the letter.
-                    rack_used_count += 1
-                    # Remove it from the rack.
-                    rack = rack[:rack_index] + "!" + rack[rack_index + 1:]
-                    rack_used_indices.append(rack_index)
-                else:
-                    # See if we have a blank we can use.
-                    rack_index = rack.find(BLANK)
-                    if rack_index >= 0:
-                        rack_used_count += 1
-                        # Remove the blank from the rack.
-                        rack = rack[:rack_index] + "!" + rack[rack_index + 1:]
-                        rack_used_indices.append(rack_index)
-                        word_blank_indices.append(word_index)
-                    else:
+            cell = cells[line_indices[pos + word_index]]
+            if not cell:
+                # If the cell is empty, then we must use a tile from the rack: the
+                # letter if we have it, otherwise a blank.
+                slot = ord(ch) - ORD_A
+                if not rack_counts[slot]:
+                    slot = BLANK_SLOT
+                    if not rack_counts[slot]:
                         # We have no tile for this square.
-                        return -1, None, None
-            else:
-                # See if it matches the existing letter.
-                if cell != ch:
-                    return -1, None, None
+                        fits = False
+                        break
+                    word_blank_indices.append(word_index)
+
+                rack_counts[slot] -= 1
+                slots.append(slot)
+            elif cell != ord(ch):
+                # Doesn't match the existing letter.
+                fits = False
+                break
 
-            row, col = direction.increment(row, col)
+        # Put the tiles back.
+        for slot in slots:
+            rack_counts[slot] += 1
 
-        return rack_used_count, word_blank_indices, rack_used_indices
+        return (slots, word_blank_indices) if fits else None
 
     def find_edges(self, row, col, direction):
         """Start at row,col and go in direction and its opposite until we run off the
         board or find the last continuous tile. Returns (row,col,length) where length
         is the number of letters."""
 
+        cells = self.cells
+        pos, line = direction.get_line_position(row, col)
+        line_indices = self.LINE_INDICES[direction.index][line]
+
         # Find start.
-        while True:
-            # Move in reverse until we go too far.
-            row, col = direction.decrement(row, col)
+        start = pos
+        while start > 0 and cells[line_indices[start - 1]]:
+            start -= 1
 
-            # See if we went too far.
-            if row < 0 or row >= self.SIZE \
-                    or col < 0 or col >= self.SIZE \
-                    or not self.cells[self.get_index(row, col)]:
+        # Find end.
+        end = pos + 1
+        while end < self.SIZE and cells[line_indices[end]]:
+            end += 1
 
-                # Back up one.
-                row, col = direction.increment(row, col)
-                break
-        else:
-            # Can't get here.
-            raise BoardError()
+        row, col = direction.get_absolute_position(start, line)
+        return (row, col, end - start)
+
+    def get_word(self, row, col, length, direction):
+        """Return the word at the location and with the given length."""
 
-        # Go forward until we've gone too far.
-        for length in range(1, self.SIZE + 1):
-            end_row, end_col = direction.increment(row, col, length)
+        step = direction.drow*self.SIZE + direction.dcol
+        index = self.get_index(row, col)
 
-            # See if we've gone too far.
-            if end_row < 0 or end_row >= self.SIZE \
-                    or end_col < 0 or end_col >= self.SIZE \
-                    or not self.cells[self.get_index(end_row, end_col)]:
+        return str(self.cells[index:index + step*length:step])
 
-                return (row, col, length)
+    def has_neighboring_cell(self, row, col, direction, length):
+        """Returns whether the word has any cells along its length, just to the side
+        of it, that are taken."""
 
-        # Can't get here.
-        raise BoardError()
+        pos, line = direction.get_line_position(row, col)
+        word_bits = ((1 << length) - 1) << pos
 
-    def get_word(self, row, col, length, direction):
-        """Return the word at the location and with the given length."""
+        return bool(self.get_side_occupancy(line, direction) & word_bits)
 
-        word = ""
+    def get_side_occupancy(self, line, direction):
+        """Returns a bitboard of the positions along the line that have a tile just
+        to the side of them, in the neighboring lines."""
 
-        for i in range(length):
-            index = self.get_index(row, col)
-            word += self.cells[index]
-            row, col = direction.increment(row, col)
+        occupancy = self.occupancy[direction.index]
+        side = 0
+        if line > 0:
+            side |= occupancy[line - 1]
+        if line < self.SIZE - 1:
+            side |= occupancy[line + 1]
 
-        return word
+        return side
 
-    def is_relative_cell_empty(self, row, col, direction, dpos, dline):
-        """Check a relative cell to see if it's empty. The dpos is along the direction
-        and dline is perpendicular to it."""
+    def get_touching(self, line, direction):
+        """Returns a bitboard of the positions along the line that a new word must
+        cover to connect to the tiles on the board: squares with a tile and squares
+        with a tile just to the side. On an empty board, the middle square."""
 
-        # Find the relative position.
-        other_row, other_col = direction.get_relative_position(row, col, dpos, dline)
+        if self.is_empty():
+            pos, middle_line = direction.get_line_position(self.MID_ROW, self.MID_COL)
+            return 1 << pos if line == middle_line else 0
 
-        return other_row >= 0 and other_row < Board.SIZE \
-                and other_col >= 0 and other_col < Board.SIZE \
-                and self.cells[Board.get_index(other_row, other_col)]
+        return self.occupancy[direction.index][line] \
+                | self.get_side_occupancy(line, direction)
 
-    def has_neighboring_cell(self, row, col, direction, length):
-        """Returns whether the word has any cells along its length, just to the side
-        of it, that are taken."""
+    def get_anchors(self, line, direction):
+        """Returns a bitboard of the anchor squares of the line: empty squares with
+        a tile next to them, either along the line or to the side. On an empty
+        board, the middle square."""
 
-        for i in range(length):
-            if self.is_relative_cell_empty(row, col, direction, i, 1) \
-                    or self.is_relative_cell_empty(row, col, direction, i, -1):
+        if self.is_empty():
+            return self.get_touching(line, direction)
 
-                return True
+        occupied = self.occupancy[direction.index][line]
+        neighbors = (occupied << 1) | (occupied >> 1) \
+                | self.get_side_occupancy(line, direction)
 
-        return False
+        return neighbors & ~occupied & self.FULL_LINE
 
-    def generate_solutions(self, rack, dictionary):
-        """Generates a list of solutions for the given rack. Not all solutions are legal."""
+    def find_end(self, row, col, direction, step):
+        """Starting at the tile at row,col, go along "direction" (backward if "step" is -1)
+        past the contiguous tiles and return the index of the first empty square.
+        Returns None if we run off the board."""
 
-        print "Generating solutions..."
-        solutions = []
-        before = time.time()
+        while True:
+            row += direction.drow*step
+            col += direction.dcol*step
+            if row < 0 or row >= self.SIZE or col < 0 or col >= self.SIZE:
+                return None
+            index = self.get_index(row, col)
+            if not self.cells[index]:
+                return index
+
+    def update_cross_checks(self, dictionary):
+        """Bring the cross-checks up to date. Only the squares next to tiles added since
+        the last update are recomputed, unless the dictionary has changed."""
+
+        if dictionary is not self.cross_check_dictionary:
+            self.cross_check_dictionary = dictionary
+            dirty_cross_checks = range(self.CELL_COUNT)
+        elif self.dirty_cross_checks:
+            dirty_cross_checks = self.dirty_cross_checks
+        else:
+            return
+
+        for index in dirty_cross_checks:
+            row, col = divmod(index, self.SIZE)
+            for direction in DIRECTIONS:
+                self.cross_checks[direction.index][index], \
+                        self.cross_scores[direction.index][index] = \
+                        self.compute_cross_check(row, col, direction, dictionary)
+
+        self.dirty_cross_checks = set()
+
+    def compute_cross_check(self, row, col, direction, dictionary):
+        """For an empty square, returns a tuple of the set of letters that can be put
+        there by a word going in "direction" without making an illegal perpendicular
+        word, and the score of the perpendicular tiles. If there are no perpendicular
+        tiles, returns (ALL_LETTERS, None). Occupied squares return (0, None)."""
+
+        cells = self.cells
+        if cells[self.get_index(row, col)]:
+            return 0, None
+
+        perpendicular_direction = direction.get_perpendicular_direction()
+        pos, line = perpendicular_direction.get_line_position(row, col)
+        line_indices = self.LINE_INDICES[perpendicular_direction.index][line]
+
+        # Tiles just before and just after the square.
+        start = pos
+        while start > 0 and cells[line_indices[start - 1]]:
+            start -= 1
+        end = pos + 1
+        while end < self.SIZE and cells[line_indices[end]]:
+            end += 1
+
+        if start == pos and end == pos + 1:
+            return ALL_LETTERS, None
+
+        prefix = "".join(chr(cells[index]) for index in line_indices[start:pos])
+        suffix = "".join(chr(cells[index]) for index in line_indices[pos + 1:end])
+
+        # Score of the perpendicular tiles, which don't get any premiums.
+        score = 0
+        for index in line_indices[start:end]:
+            if cells[index] and not self.blanks >> index & 1:
+                score += LETTER_SCORE[chr(cells[index])]
+
+        letters = 0
+        for ch, bit in LETTER_BITS.iteritems():
+            if dictionary.has_word(prefix + ch + suffix):
+                letters |= bit
+
+        return letters, score
+
+    def fits_cross_checks(self, word, row, col, direction):
+        """Whether every letter that "word" would add to the board makes a legal
+        perpendicular word. The cross-checks must be up to date. Letters that would
+        go off the board are ignored."""
+
+        cells = self.cells
+        cross_checks = self.cross_checks[direction.index]
+        pos, line = direction.get_line_position(row, col)
+        for ch, index in zip(word, self.LINE_INDICES[direction.index][line][pos:]):
+            if not cells[index] and not cross_checks[index] & LETTER_BITS[ch]:
+                return False
+
+        return True
+
+    def generate_solutions(self, rack, dictionary, generator=GENERATOR_SUBSETS):
+        """Generates a list of solutions for the given rack. Not all solutions are
+        legal. The generator is one of the GENERATOR_ constants. See iter_solutions()
+        to get them without making a list."""
+
+        return list(self.iter_solutions(rack, dictionary, generator))
+
+    def iter_solutions(self, rack, dictionary, generator=GENERATOR_SUBSETS):
+        """Yields the solutions of generate_solutions(), in the same order, as each
+        line is generated, so that only one line's worth is held at a time."""
+
+        for candidate in self.iter_candidates(rack, dictionary, generator):
+            yield Solution.from_candidate(candidate)
+
+    def iter_candidates(self, rack, dictionary, generator=GENERATOR_SUBSETS):
+        """Same as iter_solutions() but yields candidates (see get_candidate_score()).
+        This is the first stage of the pipeline of find_best_move(): the line
+        generators put words where they fit and reject those that fail the
+        cross-checks, and then the same move generated more than once is dropped.
+        For example, a move is generated as a word and as the longer word it makes
+        with the tiles at its ends, or horizontally and vertically if it's a single
+        tile."""
+
+        # Placements of the single tiles yielded so far. A placement of more tiles is
+        # only generated in the line that they're all in, so these are the only ones
+        # to remember from one line to the next.
+        single_tiles = set()
+
+        # For instrumentation.
+        duplicates = 0
 
         # For each direction.
         for direction in DIRECTIONS:
             # Try every line (row or column).
             for line in range(Board.SIZE):
-                # Add solutions along this line to the list.
-                self.generate_solutions_in_line(rack, dictionary, line, direction, solutions)
+                before = time.time()
+                candidates = []
+                self.generate_solutions_in_line_cached(rack, dictionary, line, direction,
+                        candidates, generator)
+                if instrumentation.enabled:
+                    instrumentation.add_time("generate", time.time() - before)
+
+                placements = set()
+                for candidate in candidates:
+                    placement = get_candidate_placement(self, candidate)
+                    if placement in placements or placement in single_tiles:
+                        duplicates += 1
+                        continue
+                    if len(placement) == 1:
+                        single_tiles.add(placement)
+                    else:
+                        placements.add(placement)
+                    yield candidate
 
-        after = time.time()
-        elapsed = after - before
-        print "    Time: %.1fs (%d words/second)" % (elapsed, len(dictionary.words)/elapsed)
+        if instrumentation.enabled:
+            instrumentation.count("duplicate_candidates", duplicates)
 
-        return solutions
+    def remove_duplicate_solutions(self, solutions):
+        """Returns the list of solutions without those that put down the same tiles
+        as an earlier one (see Solution.get_placement()), so that each move is only
+        scored once. See iter_solutions() for how duplicates come about."""
 
-    def generate_solutions_in_line(self, rack, dictionary, line, direction, solutions):
-        """Given a rack and line (row or column) add possible solutions to the list.
-        Not all solutions will be legal; they're only guaranteed to fit."""
+        placements = set()
+        unique_solutions = []
+        for solution in solutions:
+            placement = solution.get_placement(self)
+            if placement not in placements:
+                placements.add(placement)
+                unique_solutions.append(solution)
+
+        if instrumentation.enabled:
+            instrumentation.count("duplicate_candidates",
+                    len(solutions) - len(unique_solutions))
+
+        return unique_solutions
+
+    def get_line_generator(self, generator):
+        """Returns the method that adds the candidates in one line for the given
+        GENERATOR_ constant. See generate_solutions_in_line() for its parameters."""
+
+        if generator == GENERATOR_SUBSETS:
+            return self.generate_solutions_in_line
+        elif generator == GENERATOR_DAWG:
+            return self.generate_solutions_in_line_dawg
+        elif generator == GENERATOR_NUMPY:
+            if not numpy_fit.is_available():
+                raise ValueError("the %s generator needs NumPy" % generator)
+            return self.generate_solutions_in_line_numpy
+        else:
+            raise ValueError("unknown generator: %s" % generator)
+
+    def generate_solutions_in_line_cached(self, rack, dictionary, line, direction,
+            candidates, generator=GENERATOR_SUBSETS):
+        """Same as the line generator of the GENERATOR_ constant (see
+        get_line_generator()), but reuses the candidates found earlier for the same
+        line and the same tiles in the rack, in any order. They're kept in the
+        dictionary's line cache, keyed by everything about the line that the
+        generators look at: its tiles, the squares a word must touch, and the
+        cross-checks of its empty squares. Only the lines that changed since the
+        last move are generated again for the same rack.
+
+        If the dictionary has no line cache (see Dictionary.set_line_cache_size()),
+        this is the same as the line generator."""
+
+        if dictionary.line_cache is None:
+            self.get_line_generator(generator)(rack, dictionary, line, direction,
+                    candidates)
+            return
+
+        self.update_cross_checks(dictionary)
+
+        cells = self.cells
+        line_indices = self.LINE_INDICES[direction.index][line]
+        cross_checks = self.cross_checks[direction.index]
+        sorted_rack = "".join(sorted(rack))
+        key = (generator, direction.index, line, self.get_touching(line, direction),
+                str(bytearray(cells[index] for index in line_indices)),
+                tuple(0 if cells[index] else cross_checks[index] for index in line_indices),
+                sorted_rack)
+
+        # Candidates of the sorted rack.
+        line_candidates = dictionary.line_cache.get(key)
+        if line_candidates is None:
+            line_candidates = []
+            self.get_line_generator(generator)(sorted_rack, dictionary, line, direction,
+                    line_candidates)
+            dictionary.line_cache.put(key, line_candidates)
+            if instrumentation.enabled:
+                instrumentation.count("line_cache_misses")
+        elif instrumentation.enabled:
+            instrumentation.count("line_cache_hits")
+
+        if rack == sorted_rack:
+            candidates.extend(line_candidates)
+            return
+
+        # From rack mask of the sorted rack to the same tiles' mask of "rack", built
+        # from the mask without its lowest bit.
+        rack_order = sorted(range(len(rack)), key=rack.__getitem__)
+        rack_masks = [0]
+        for mask in range(1, 1 << len(rack)):
+            low_bit = mask & -mask
+            rack_masks.append(rack_masks[mask ^ low_bit]
+                    | 1 << rack_order[low_bit.bit_length() - 1])
+
+        for row, col, direction, word, blank_mask, rack_mask in line_candidates:
+            candidates.append((row, col, direction, word, blank_mask, rack_masks[rack_mask]))
+
+    def get_possible_words(self, rack, dictionary, line, direction):
+        """Returns the words that might be made in the line with the rack, those
+        made of the letters of the rack and of the line plus any blanks, as a dict
+        from word length to a bitset of word ids that can be intersected with the
+        positional index (see PositionalIndex). Also returns the number of
+        combinations of letters looked up, for instrumentation."""
 
         # Figure out what letters we have. We take the union of the letters in our rack
-        # and those in the line.
-        available_letters = set(rack)
-        available_letters.discard(BLANK)
-        for pos in range(Board.SIZE):
-            row, col = direction.get_absolute_position(pos, line)
-            ch = self.cells[Board.get_index(row, col)]
-            if ch:
-                available_letters.add(ch)
-        available_letters = "".join(sorted(available_letters))
-
-        # Get the list of words that can be made with this set of letters, taking into
-        # account any blanks in the rack.
+        # and those in the line, as a mask of LETTER_BITS.
+        available_letters = 0
+        for ch in rack:
+            if ch != BLANK:
+                available_letters |= LETTER_BITS[ch]
+        for index in self.LINE_INDICES[direction.index][line]:
+            if self.cells[index]:
+                available_letters |= LETTER_BITS[chr(self.cells[index])]
+
+        # Get the words that can be made with this set of letters, taking into account
+        # any blanks in the rack.
         blank_count = rack.count(BLANK)
         if blank_count == 0:
+            # Try every combination of available letters by walking down the submasks
+            # of the available letters. Combinations that make no words aren't in the
+            # map and are skipped. Each word is under only one key, so the word ids we
+            # collect are all different.
             letters_map = dictionary.letters_map
-        elif blank_count == 1:
-            letters_map = dictionary.letters_map_one_blank
-        elif blank_count == 2:
-            letters_map = dictionary.letters_map_two_blanks
-        else:
-            raise TooManyBlanksError()
-
-        # Try each word to see if it can fit physically. We try every combination of
-        # available letters.
-        possible_words = set()
+            possible_ids = []
 
-        # Keep track of which letter we're using for this combination.
-        used = [False]*len(available_letters)
+            # How many combinations we tried.
+            combinations = 0
+            subletters = available_letters
+            while subletters:
+                combinations += 1
 
-        # How many combinations we tried.
-        combinations = 0
-        while True:
-            combinations += 1
-
-            # Put together the word for this combination of letters.
-            word = ""
-            for i, is_used in enumerate(used):
-                if is_used:
-                    word += available_letters[i]
-            if word:
                 # Add the words that can be made with this subset of letters.
-                possible_words.update(letters_map[word])
-
-            # Increment the combination.
-            for j in range(len(used)):
-                if not used[j]:
-                    used[j] = True
-                    break
-                else:
-                    used[j] = False
-            else:
-                break
+                ids = letters_map.get_ids(subletters)
+                if ids:
+                    possible_ids.extend(ids)
+
+                # Next combination.
+                subletters = (subletters - 1) & available_letters
+
+            possible_bits_by_length = dictionary.get_positional_index().get_bits_by_length(
+                    possible_ids)
+        elif blank_count <= 2:
+            combinations = 0
+            possible_bits_by_length = dictionary.get_blank_words(available_letters,
+                    blank_count)
+        else:
+            raise TooManyBlanksError()
 
-        print "    Line %d: %s (%d combinations, %d words)" % (
-                line, available_letters, combinations, len(possible_words))
+        return possible_bits_by_length, combinations
+
+    def generate_solutions_in_line(self, rack, dictionary, line, direction, candidates):
+        """Given a rack and line (row or column) add possible solutions to the list,
+        as candidates (see get_candidate_score()). Not all solutions will be legal;
+        they're only guaranteed to fit."""
+
+        # Squares that a word must cover to connect to the board. If there are none,
+        # no word in this line can.
+        touching = self.get_touching(line, direction)
+        if not touching:
+            return
+
+        possible_bits_by_length, combinations = self.get_possible_words(rack, dictionary,
+                line, direction)
+        positional_index = dictionary.get_positional_index()
+
+        # Make sure we can reject words that make illegal perpendicular words.
+        self.update_cross_checks(dictionary)
+
+        words = dictionary.words
+        cells = self.cells
+        line_indices = self.LINE_INDICES[direction.index][line]
+        occupied = self.occupancy[direction.index][line]
+        rack_counts = get_rack_counts(rack)
+
+        # For instrumentation. The number of words, of (word, position) pairs, and of
+        # those pairs that we tried.
+        candidate_count = len(candidates)
+        words_looked_up = 0
+        pairs = 0
+        placements = 0
+        cross_check_rejections = 0
+
+        # Try each length of word.
+        for length, possible_bits in possible_bits_by_length.iteritems():
+            if not possible_bits:
+                continue
+            postings = positional_index.postings[length]
+            if instrumentation.enabled:
+                word_count = bin(possible_bits).count("1")
+                words_looked_up += word_count
+                pairs += word_count*(Board.SIZE - length + 1)
+
+            # Bits of the squares the word covers at position 0.
+            word_bits = (1 << length) - 1
 
-        # Try each word.
-        for word in possible_words:
             # Try each position in the line.
-            for pos in range(Board.SIZE - len(word) + 1):
-                # Get the absolute position given our relative position.
-                row, col = direction.get_absolute_position(pos, line)
-
-                # See if this word will physically fit and how much of our rack we're using.
-                rack_used_count, word_blank_indices, rack_used_indices = self.try_word(word,
-                        rack, row, col, direction)
-
-                # If the board is empty, then we must use the middle square.
-                if self.is_empty():
-                    # Get the extent of our word.
-                    first_row = row
-                    first_col = col
-                    last_row = first_row + direction.drow*(len(word) - 1)
-                    last_col = first_col + direction.dcol*(len(word) - 1)
-
-                    # See if the extent covers the middle square.
-                    is_valid = rack_used_count == len(word) \
-                            and first_row <= Board.MID_ROW \
-                            and last_row >= Board.MID_ROW \
-                            and first_col <= Board.MID_COL \
-                            and last_col >= Board.MID_COL
-                else:
-                    # If all of the letters came from our rack, then that's allowed only
-                    # if we're touching another existing letter on the board. Don't need to
-                    # check the front and back of the word, that's checked separately since,
-                    # if the full thing is a word, that'll be generated also.
-                    if rack_used_count == len(word):
-                        is_valid = self.has_neighboring_cell(row, col, direction, len(word))
-                    else:
-                        # Otherwise we must have used at least one letter from our rack.
-                        is_valid = rack_used_count > 0
-
-                if is_valid:
-                    # Add to our list of solutions.
-                    solutions.append(Solution(row, col, direction, word,
-                        word_blank_indices, rack_used_indices))
-                    # if blanks, try others possible indices on same letter
-                    # ABa / aBA
-                    for i, indice in enumerate(word_blank_indices):
-                        wb = word[indice]
-                        for match in re.finditer(wb, word):
-                            if match != indice:
-                                wbi = list(word_blank_indices)
-                                wbi[i] = match.start()
-                                solutions.append(Solution(row, col, direction, word,
-                                    wbi, rack_used_indices))
+            for pos in range(Board.SIZE - length + 1):
+                # Skip positions that don't connect to the board (or, if the board is
+                # empty, don't cover the middle square).
+                if not (word_bits << pos) & touching:
+                    continue
+
+                # Keep the words that have the letters of the tiles already on the board
+                # in the same places.
+                bits = possible_bits
+                fixed = (occupied >> pos) & word_bits
+                offset = 0
+                while fixed and bits:
+                    if fixed & 1:
+                        bits &= postings[offset][cells[line_indices[pos + offset]] - ORD_A]
+                    fixed >>= 1
+                    offset += 1
+
+                for word_id in positional_index.iter_ids(length, bits):
+                    word = words[word_id]
+                    placements += 1
+
+                    # See if this word will physically fit and how much of our rack we're using.
+                    fit = self.fit_word(word, rack_counts, line_indices, pos)
+                    if fit is not None and not self.add_fitting_word(word, fit, rack,
+                            line, pos, direction, candidates):
+
+                        cross_check_rejections += 1
+
+        if instrumentation.enabled:
+            instrumentation.count("combinations", combinations)
+            instrumentation.count("words_looked_up", words_looked_up)
+            instrumentation.count("placements_tried", placements)
+            instrumentation.count("placements_skipped", pairs - placements)
+            instrumentation.count("cross_check_rejections", cross_check_rejections)
+            instrumentation.count("candidates", len(candidates) - candidate_count)
+
+    def generate_solutions_in_line_numpy(self, rack, dictionary, line, direction,
+            candidates):
+        """Same as generate_solutions_in_line() but, for each word length, finds which
+        words match the line's tiles and have enough tiles in the rack at every
+        position at once with NumPy (see numpy_fit.find_fits()). Only those are
+        fitted to the rack one at a time. Adds the same candidates in the same
+        order."""
+
+        # Squares that a word must cover to connect to the board. If there are none,
+        # no word in this line can.
+        touching = self.get_touching(line, direction)
+        if not touching:
+            return
+
+        possible_bits_by_length, combinations = self.get_possible_words(rack, dictionary,
+                line, direction)
+        positional_index = dictionary.get_positional_index()
+        word_matrices = dictionary.get_word_matrices()
+
+        # Make sure we can reject words that make illegal perpendicular words.
+        self.update_cross_checks(dictionary)
+
+        words = dictionary.words
+        line_indices = self.LINE_INDICES[direction.index][line]
+        line_cells = bytearray(self.cells[index] for index in line_indices)
+        rack_counts = get_rack_counts(rack)
+
+        # For instrumentation.
+        candidate_count = len(candidates)
+        words_looked_up = 0
+        pairs = 0
+        placements = 0
+        cross_check_rejections = 0
+
+        # Try each length of word.
+        for length, possible_bits in possible_bits_by_length.iteritems():
+            if not possible_bits:
+                continue
+            ranks = numpy_fit.get_ranks(possible_bits, positional_index.counts[length])
+
+            # Positions that connect to the board (or, if the board is empty, cover the
+            # middle square).
+            word_bits = (1 << length) - 1
+            positions = [pos for pos in range(Board.SIZE - length + 1)
+                    if (word_bits << pos) & touching]
+            if instrumentation.enabled:
+                words_looked_up += len(ranks)
+                pairs += len(ranks)*(Board.SIZE - length + 1)
+
+            start = positional_index.starts[length]
+            for pos, rank in zip(*numpy_fit.find_fits(word_matrices.get_matrix(length),
+                    ranks, line_cells, positions, rack_counts)):
+
+                word = words[start + rank]
+                placements += 1
+
+                # Find which of the rack's tiles to use.
+                fit = self.fit_word(word, rack_counts, line_indices, pos)
+                if not self.add_fitting_word(word, fit, rack, line, pos, direction,
+                        candidates):
+
+                    cross_check_rejections += 1
+
+        if instrumentation.enabled:
+            instrumentation.count("combinations", combinations)
+            instrumentation.count("words_looked_up", words_looked_up)
+            instrumentation.count("placements_tried", placements)
+            instrumentation.count("placements_skipped", pairs - placements)
+            instrumentation.count("cross_check_rejections", cross_check_rejections)
+            instrumentation.count("candidates", len(candidates) - candidate_count)
+
+    def add_fitting_word(self, word, fit, rack, line, pos, direction, candidates):
+        """Adds the candidates of a word that fits at position "pos" of the line, "fit"
+        being what fit_word() returned, if it passes the cross-checks. Returns False
+        if it doesn't."""
+
+        slots, word_blank_indices = fit
+
+        # We must have used at least one letter from our rack. If all of the
+        # letters came from our rack, then the word covers a square with a tile
+        # just to its side, so it's touching the board. Don't need to check the
+        # front and back of the word, that's checked separately since, if the
+        # full thing is a word, that'll be generated also.
+        if not slots:
+            return True
+
+        # Get the absolute position given our relative position.
+        row, col = direction.get_absolute_position(pos, line)
+
+        # Check the perpendicular words of the tiles we're adding.
+        if not self.fits_cross_checks(word, row, col, direction):
+            return False
+
+        # Add to our list of solutions. Only now do we need to know which of the
+        # rack's tiles were used.
+        rack_mask = get_mask(get_rack_indices(rack, slots))
+        candidates.append((row, col, direction, word, get_mask(word_blank_indices),
+            rack_mask))
+
+        # If we used blanks, also add the other new tiles they could be (ABa / aBA).
+        if word_blank_indices:
+            line_indices = self.LINE_INDICES[direction.index][line]
+            for blank_indices in self.get_blank_arrangements(word, word_blank_indices,
+                    line_indices, pos):
+
+                candidates.append((row, col, direction, word, get_mask(blank_indices),
+                    rack_mask))
+
+        return True
+
+    def get_blank_arrangements(self, word, word_blank_indices, line_indices, pos):
+        """Given a word that fits at position "pos" of the line with the squares
+        "line_indices", using blanks at "word_blank_indices", returns a list of the
+        other sorted lists of indices within "word" where the blanks could be instead.
+        The blanks can only stand for tiles that are being added, and for the same
+        letters as in "word_blank_indices"."""
+
+        # From letter to the indices within "word" of the tiles being added.
+        new_indices = collections.defaultdict(list)
+        for word_index, ch in enumerate(word):
+            if not self.cells[line_indices[pos + word_index]]:
+                new_indices[ch].append(word_index)
+
+        # Choose the squares of the blanks of each letter independently.
+        blank_counts = collections.Counter(word[word_index]
+                for word_index in word_blank_indices)
+        choices = [itertools.combinations(new_indices[ch], count)
+                for ch, count in blank_counts.iteritems()]
+
+        original = sorted(word_blank_indices)
+        arrangements = []
+        for choice in itertools.product(*choices):
+            blank_indices = sorted(itertools.chain(*choice))
+            if blank_indices != original:
+                arrangements.append(blank_indices)
+
+        return arrangements
+
+    def generate_solutions_in_line_dawg(self, rack, dictionary, line, direction, candidates):
+        """Same as generate_solutions_in_line() but walks the dictionary's word graph
+        outward from each anchor square (an empty square next to a tile), as described
+        by Appel and Jacobson. Only words that physically fit and make legal
+        perpendicular words are added. Words include the tiles they extend."""
+
+        dawg = dictionary.get_dawg()
+        is_empty = self.is_empty()
+        self.update_cross_checks(dictionary)
+        candidate_count = len(candidates)
+
+        # Contents of the line. None for empty square.
+        line_indices = self.LINE_INDICES[direction.index][line]
+        squares = [self.get_letter(index) for index in line_indices]
+
+        # Whether each square is an anchor. The first word must go through the middle
+        # square.
+        anchor_bits = self.get_anchors(line, direction)
+        if not anchor_bits:
+            return
+        anchors = [bool(anchor_bits >> pos & 1) for pos in range(Board.SIZE)]
+
+        # Letters allowed on each empty square.
+        cross_checks = [ALL_LETTERS]*Board.SIZE
+        if not is_empty:
+            for pos, ch in enumerate(squares):
+                if ch is None:
+                    cross_checks[pos] = self.cross_checks[direction.index][line_indices[pos]]
+
+        # From letter to the list of indices in the rack that have that letter, and
+        # the indices of the blanks. Tiles are popped off when used.
+        rack_letters = collections.defaultdict(list)
+        rack_blanks = []
+        for rack_index, ch in enumerate(rack):
+            if ch == BLANK:
+                rack_blanks.append(rack_index)
+            else:
+                rack_letters[ch].append(rack_index)
 
+        # The word being built, and for each of its letters that came from the
+        # rack, the index in "rack" and whether it was a blank.
+        word = []
+        rack_used_indices = []
+        word_blank_indices = []
+
+        def add_solution(end):
+            """Add the current word, whose last letter is just before "end"."""
+
+            row, col = direction.get_absolute_position(end - len(word), line)
+            candidates.append((row, col, direction, "".join(word),
+                get_mask(word_blank_indices), get_mask(rack_used_indices)))
+
+        def place_tile(ch, node, extend, *args):
+            """Play "ch" from the rack, first as a real tile and then as a blank,
+            calling extend(node, *args) for each."""
+
+            letter_indices = rack_letters.get(ch)
+            if letter_indices:
+                rack_used_indices.append(letter_indices.pop())
+                word.append(ch)
+                extend(node, *args)
+                word.pop()
+                letter_indices.append(rack_used_indices.pop())
+
+            if rack_blanks:
+                rack_used_indices.append(rack_blanks.pop())
+                word_blank_indices.append(len(word))
+                word.append(ch)
+                extend(node, *args)
+                word.pop()
+                word_blank_indices.pop()
+                rack_blanks.append(rack_used_indices.pop())
+
+        def extend_right(node, pos, anchor):
+            """Extend the word rightward from "pos", which is at or past the anchor."""
+
+            if pos < Board.SIZE and squares[pos] is not None:
+                # Must use the tile that's already there.
+                ch = squares[pos]
+                child = node.edges.get(ch)
+                if child is not None:
+                    word.append(ch)
+                    extend_right(child, pos + 1, anchor)
+                    word.pop()
+                return
+
+            # The word is followed by an empty square or the edge of the board. It
+            # must have covered the anchor.
+            if node.final and pos > anchor:
+                add_solution(pos)
+
+            if pos < Board.SIZE:
+                allowed = cross_checks[pos]
+                for ch, child in node.edges.iteritems():
+                    if allowed & LETTER_BITS[ch]:
+                        place_tile(ch, child, extend_right, pos + 1, anchor)
+
+        def left_part(node, limit, anchor):
+            """Build every left part of at most "limit" tiles to put before the anchor,
+            then extend each to the right."""
+
+            extend_right(node, anchor, anchor)
+            if limit > 0:
+                for ch, child in node.edges.iteritems():
+                    place_tile(ch, child, left_part, limit - 1, anchor)
+
+        for anchor in range(Board.SIZE):
+            if not anchors[anchor]:
+                continue
+
+            if anchor > 0 and squares[anchor - 1] is not None:
+                # The left part is the tiles already on the board.
+                start = anchor - 1
+                while start > 0 and squares[start - 1] is not None:
+                    start -= 1
+                node = dawg.follow(squares[start:anchor])
+                if node is not None:
+                    word.extend(squares[start:anchor])
+                    extend_right(node, anchor, anchor)
+                    del word[:]
+            else:
+                # The left part can use empty squares that aren't anchors. Any
+                # earlier anchor will have generated the words that reach it.
+                limit = 0
+                pos = anchor - 1
+                while pos >= 0 and squares[pos] is None and not anchors[pos]:
+                    limit += 1
+                    pos -= 1
+                left_part(dawg.root, limit, anchor)
+
+        if instrumentation.enabled:
+            instrumentation.count("candidates", len(candidates) - candidate_count)
 
     def find_best_solution(self, solutions, dictionary):
         """Given a list of possible solutions, score them and find the best one. Also
-        eliminate invalid solutions (e.g., those that make illegal perpendicular words)."""
+        eliminate invalid solutions (e.g., those that make illegal perpendicular words).
+        The solutions can be any iterable, such as iter_solutions()."""
 
         best_solution = None
 
+        for solution in self.iter_scored_solutions(solutions, dictionary):
+            if solution.score > 0 and \
+                    (best_solution is None or solution.score > best_solution.score):
+
+                best_solution = solution
+
+        return best_solution
+
+    def iter_scored_solutions(self, solutions, dictionary):
+        """Scores each solution of the iterable as it comes and yields the legal ones."""
+
+        # For instrumentation. Only time the scoring if someone's listening, since
+        # it's done for each solution.
+        timed = instrumentation.enabled
+        scored = 0
+        illegal = 0
+        score_time = 0
+
         for solution in solutions:
+            if timed:
+                before = time.time()
+                solution.determine_score(self, dictionary)
+                score_time += time.time() - before
+            else:
+                solution.determine_score(self, dictionary)
+            scored += 1
+
+            if solution.score is None:
+                illegal += 1
+            else:
+                yield solution
+
+        if instrumentation.enabled:
+            instrumentation.count("scored", scored)
+            instrumentation.count("illegal", illegal)
+            instrumentation.add_time("score", score_time)
+
+    def find_best_candidate(self, candidates, dictionary):
+        """Same as find_best_solution() but for an iterable of candidates (see
+        get_candidate_score()). Returns a tuple of the best candidate and its score,
+        or None if none are legal."""
+
+        best_candidate = None
+        best_score = 0
+
+        # For instrumentation.
+        timed = instrumentation.enabled
+        scored = 0
+        illegal = 0
+        score_time = 0
+
+        for candidate in candidates:
+            if timed:
+                before = time.time()
+                score = get_candidate_score(self, dictionary, candidate)
+                score_time += time.time() - before
+            else:
+                score = get_candidate_score(self, dictionary, candidate)
+            scored += 1
+
+            if score is None:
+                illegal += 1
+            elif score > best_score:
+                best_candidate = candidate
+                best_score = score
+
+        if instrumentation.enabled:
+            instrumentation.count("scored", scored)
+            instrumentation.count("illegal", illegal)
+            instrumentation.add_time("score", score_time)
+
+        if best_candidate is None:
+            return None
+
+        return best_candidate, best_score
+
+    def find_best_candidate_batched(self, candidates, dictionary,
+            batch_size=numpy_score.BATCH_SIZE):
+        """Same as find_best_candidate() but scores "batch_size" candidates at a time
+        with NumPy (see numpy_score.BatchScorer)."""
+
+        scorer = numpy_score.BatchScorer(self, dictionary)
+        candidates = iter(candidates)
+        best_candidate = None
+        best_score = 0
+
+        # For instrumentation. Only the scoring is timed, not the generation of the
+        # candidates pulled from "candidates".
+        timed = instrumentation.enabled
+        scored = 0
+        illegal = 0
+        score_time = 0
+
+        while True:
+            batch = list(itertools.islice(candidates, batch_size))
+            if not batch:
+                break
+
+            if timed:
+                before = time.time()
+                scores = scorer.score(batch)
+                score_time += time.time() - before
+            else:
+                scores = scorer.score(batch)
+            for candidate, score in zip(batch, scores):
+                if score is None:
+                    illegal += 1
+                elif score > best_score:
+                    best_candidate = candidate
+                    best_score = score
+            scored += len(batch)
+
+        if instrumentation.enabled:
+            instrumentation.count("scored", scored)
+            instrumentation.count("illegal", illegal)
+            instrumentation.add_time("score", score_time)
+
+        if best_candidate is None:
+            return None
+
+        return best_candidate, best_score
+
+    def find_best_move(self, rack, dictionary, generator=GENERATOR_SUBSETS):
+        """Same as find_best_solution() of generate_solutions(), but each solution is
+        scored as soon as it's generated, so they're never all in memory at once, and
+        only the best is made into a Solution. That's not so if the dictionary has a
+        line cache (see generate_solutions_in_line_cached()), which keeps every
+        line's solutions. With GENERATOR_NUMPY they're scored in batches (see
+        find_best_candidate_batched())."""
+
+        candidates = self.iter_candidates(rack, dictionary, generator)
+        if generator == GENERATOR_NUMPY:
+            best = self.find_best_candidate_batched(candidates, dictionary)
+        else:
+            best = self.find_best_candidate(candidates, dictionary)
+        if best is None:
+            return None
+
+        candidate, score = best
+        return Solution.from_candidate(candidate, score)
+
+    def get_line_scores(self):
+        """Returns, for each direction index and line (row or column), the total score
+        of the tiles on that line. Blanks are worth zero."""
+
+        line_scores = [[0]*self.SIZE for direction in DIRECTIONS]
+        for index, code in enumerate(self.cells):
+            if code and not self.blanks >> index & 1:
+                row, col = divmod(index, self.SIZE)
+                line_scores[0][row] += LETTER_SCORE[chr(code)]
+                line_scores[1][col] += LETTER_SCORE[chr(code)]
+
+        return line_scores
+
+    def get_score_upper_bound(self, solution, line_scores):
+        """Returns a number that the solution's score can't exceed, or None if the
+        solution is known to be illegal. The new tiles get their premiums and every
+        tile already on the line counts toward the main word. The perpendicular words
+        come from the cross-checks, which must be up to date. line_scores comes from
+        get_line_scores()."""
+
+        return self.get_candidate_upper_bound(solution.get_candidate(), line_scores)
+
+    def get_candidate_upper_bound(self, candidate, line_scores):
+        """Same as get_score_upper_bound() for a candidate (see get_candidate_score())."""
+
+        row, col, direction, word, blank_mask, rack_mask = candidate
+        cross_checks = self.cross_checks[direction.index]
+        cross_scores = self.cross_scores[direction.index]
+
+        # The line is the row for a horizontal word and the column for a vertical one.
+        line = col if direction.drow else row
+
+        word_score = line_scores[direction.index][line]
+        word_multiplier = 1
+        cross_score = 0
+        step = direction.drow*self.SIZE + direction.dcol
+        index = self.get_index(row, col)
+        for word_index, ch in enumerate(word):
+            if not self.cells[index]:
+                if not cross_checks[index] & LETTER_BITS[ch]:
+                    return None
+
+                letter_score = 0 if blank_mask >> word_index & 1 else LETTER_SCORE[ch]
+                letter_score *= self.LETTER_MULTIPLIERS[index]
+                word_score += letter_score
+                word_multiplier *= self.WORD_MULTIPLIERS[index]
+
+                perpendicular_score = cross_scores[index]
+                if perpendicular_score is not None:
+                    cross_score += (perpendicular_score + letter_score) \
+                            * self.WORD_MULTIPLIERS[index]
+            index += step
+
+        bound = word_score*word_multiplier + cross_score
+        if bin(rack_mask).count("1") == 7:
+            bound += SCRABBLE_BONUS
+
+        return bound
+
+    def find_best_solution_bounded(self, solutions, dictionary):
+        """Same as find_best_solution(), but first computes a cheap upper bound on
+        the score of each solution, then scores them in order of decreasing bound and
+        stops as soon as no remaining solution can beat or tie the best score. Returns
+        the same solution as find_best_solution(). Solutions that are never scored
+        keep a score of None."""
+
+        self.update_cross_checks(dictionary)
+        line_scores = self.get_line_scores()
+        before = time.time()
+
+        # Tuples of (negative bound, position in list, solution) so that sorting puts
+        # the highest bound first and, among equal bounds, the earliest solution first.
+        bounded_solutions = []
+        for i, solution in enumerate(solutions):
+            bound = self.get_score_upper_bound(solution, line_scores)
+            if bound > 0:
+                bounded_solutions.append((-bound, i, solution))
+        bounded_solutions.sort()
+
+        best_solution = None
+        best_i = None
+        scored = 0
+        for negative_bound, i, solution in bounded_solutions:
+            if best_solution is not None and -negative_bound < best_solution.score:
+                break
+
             solution.determine_score(self, dictionary)
+            scored += 1
 
-            if solution.score > 0 and \
-                    (best_solution is None or solution.score > best_solution.score):
+            # Ties go to the solution earliest in the list, like find_best_solution().
+            if solution.score > 0 and (best_solution is None
+                    or solution.score > best_solution.score
+                    or (solution.score == best_solution.score and i < best_i)):
 
                 best_solution = solution
+                best_i = i
+
+        if instrumentation.enabled:
+            instrumentation.count("scored", scored)
+            instrumentation.count("pruned", len(bounded_solutions) - scored)
+            instrumentation.add_time("score", time.time() - before)
 
         return best_solution
 
+    def find_top_solutions(self, rack, dictionary, k, generator=GENERATOR_SUBSETS):
+        """Returns the k highest-scoring legal solutions for the rack, best first.
+        The solutions are generated one line at a time and kept in a heap of the k
+        best so far, so only k solutions (plus one line's worth) are ever held.
+        Solutions that place the same tiles are only returned once. Among equal
+        scores, the first generated comes first, so the first solution returned is
+        the one find_best_solution() would find."""
+
+        if k <= 0:
+            return []
+
+        self.update_cross_checks(dictionary)
+        line_scores = self.get_line_scores()
+        before = time.time()
+
+        # Min-heap of (score, negative generation order, placement, candidate), so
+        # that the root is the worst solution kept: lowest score, generated last.
+        heap = []
+
+        # Placements of the candidates in the heap.
+        placements = set()
+
+        # For instrumentation.
+        scored = 0
+        pruned = 0
+        duplicates = 0
+
+        order = 0
+        for direction in DIRECTIONS:
+            for line in range(Board.SIZE):
+                candidates = []
+                self.generate_solutions_in_line_cached(rack, dictionary, line, direction,
+                        candidates, generator)
+
+                for candidate in candidates:
+                    order += 1
+
+                    # Once the heap is full, skip solutions that can't beat its worst.
+                    bound = self.get_candidate_upper_bound(candidate, line_scores)
+                    if bound <= 0 or (len(heap) == k and bound <= heap[0][0]):
+                        pruned += 1
+                        continue
+
+                    placement = get_candidate_placement(self, candidate)
+                    if placement in placements:
+                        # Same score as the one we have, which was generated first.
+                        duplicates += 1
+                        continue
+
+                    score = get_candidate_score(self, dictionary, candidate)
+                    scored += 1
+                    if score <= 0:
+                        continue
+
+                    # A duplicate of a solution that was pushed out of the heap scores
+                    # no better than the worst, so it's never added back.
+                    entry = (score, -order, placement, candidate)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif score > heap[0][0]:
+                        placements.remove(heapq.heapreplace(heap, entry)[2])
+                    else:
+                        continue
+                    placements.add(placement)
+
+        if instrumentation.enabled:
+            instrumentation.count("scored", scored)
+            instrumentation.count("pruned", pruned)
+            instrumentation.count("duplicates", duplicates)
+            instrumentation.add_time("top", time.time() - before)
+
+        return [Solution.from_candidate(candidate, score)
+                for score, order, placement, candidate in sorted(heap, reverse=True)]
+
     def __str__(self):
         """Return a string representation of the board, suitable for human viewing.
         Uses colors to highlight various squares."""
@@ -421,10 +1382,10 @@ class Board(object):
             cols = []
             for col in range(self.SIZE):
                 index = self.get_index(row, col)
-                cell = self.cells[index]
+                cell = self.get_letter(index)
 
                 cell_string = cell if cell else " "
-                if self.is_blank[index]:
+                if self.is_blank(index):
                     cell_string = cell.lower()
 
                 if PREMIUM_CELLS[index] == ".":
@@ -445,7 +1406,7 @@ class Board(object):
                 else:
                     raise InvalidPremiumError()
 
-                if self.is_blank[index]:
+                if self.is_blank(index):
                     background_color = 43
                     foreground_color = 30
 
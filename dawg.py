@@ -0,0 +1,112 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Directed acyclic word graph (DAWG) for anchor-based move generation."""
+
+class DawgNode(object):
+    """A node in the word graph. Edges are keyed by letter. A node is final if
+    the path from the root to it spells a word."""
+
+    __slots__ = ("edges", "final")
+
+    def __init__(self):
+        self.edges = {}
+        self.final = False
+
+    def get_signature(self):
+        """Returns a key that's equal for two nodes if and only if they
+        accept the same suffixes. Children must already be minimized."""
+
+        return self.final, tuple(sorted((letter, id(child))
+            for letter, child in self.edges.iteritems()))
+
+class Dawg(object):
+    """Minimized trie of all the words in a dictionary. Identical suffixes share
+    nodes, so the graph is much smaller than the equivalent trie."""
+
+    def __init__(self, words):
+        self.root = DawgNode()
+
+        # From signature to the canonical node with that signature.
+        self._register = {}
+
+        # Path of (parent, letter, child) edges of the last word added that
+        # haven't been checked for duplicates yet.
+        self._unchecked = []
+
+        previous_word = ""
+        for word in sorted(set(words)):
+            # Find the length of the prefix shared with the previous word.
+            common = 0
+            for a, b in zip(word, previous_word):
+                if a != b:
+                    break
+                common += 1
+
+            # Everything below the shared prefix is done and can be minimized.
+            self._minimize(common)
+
+            if self._unchecked:
+                node = self._unchecked[-1][2]
+            else:
+                node = self.root
+
+            for letter in word[common:]:
+                child = DawgNode()
+                node.edges[letter] = child
+                self._unchecked.append((node, letter, child))
+                node = child
+
+            node.final = True
+            previous_word = word
+
+        self._minimize(0)
+
+        # Only needed during construction.
+        del self._register
+        del self._unchecked
+
+    def _minimize(self, down_to):
+        """Replace the unchecked nodes deeper than "down_to" with equivalent
+        registered nodes, or register them if they're new."""
+
+        while len(self._unchecked) > down_to:
+            parent, letter, child = self._unchecked.pop()
+            signature = child.get_signature()
+            existing = self._register.get(signature)
+            if existing is None:
+                self._register[signature] = child
+            else:
+                parent.edges[letter] = existing
+
+    def follow(self, letters, node=None):
+        """Walk the letters from the given node (default the root) and return
+        the node we end up at, or None if there's no such path."""
+
+        if node is None:
+            node = self.root
+
+        for letter in letters:
+            node = node.edges.get(letter)
+            if node is None:
+                return None
+
+        return node
+
+    def has_word(self, word):
+        """Returns whether the word is in the graph."""
+
+        node = self.follow(word)
+        return node is not None and node.final
+
+    def count_nodes(self):
+        """Return the number of unique nodes in the graph."""
+
+        seen = set()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if id(node) not in seen:
+                seen.add(id(node))
+                stack.extend(node.edges.itervalues())
+
+        return len(seen)
@@ -2,66 +2,138 @@
 
 """Loads the dictionary and performs various lookups."""
 
-import collections
+import itertools
+import time
 
 from board import Board
+from dawg import Dawg
+from letters_map import LettersMap, get_letters_mask
+from lru_cache import LruCache
+from numpy_fit import WordMatrices
+from positional_index import PositionalIndex
+import dictionary_index
+import instrumentation
 
 class Dictionary(object):
     """Stores a dictionary for word lookups. All words are in upper case, are
     Scrabble-suitable (no hyphens, no proper nouns, etc.), and are 15 or fewer
     letters."""
 
+    # Number of results of get_blank_words() to keep.
+    BLANK_WORDS_CACHE_SIZE = 64
+
+    # Suggested number of lines of solutions to keep for
+    # Board.generate_solutions_in_line_cached(). See set_line_cache_size().
+    LINE_CACHE_SIZE = 512
+
     def __init__(self):
-        # List of words in no particular order.
+        # List of words, sorted by length. The index of a word in this list is its id.
         self.words = []
 
-        # From string of sorted unique letters to list of words. For example, the word
-        # "JELLO" would be in the list of words with the key "EJLO".
-        self.letters_map = collections.defaultdict(list)
+        # From set of unique letters to the ids of the words with those letters. The set
+        # is an integer mask of LETTER_BITS (see get_letters_mask()). For example, the
+        # word "JELLO" would be under the key for "EJLO". Only keys with words are present.
+        self.letters_map = LettersMap.build(self.words)
+
+        # Recent results of get_blank_words(), from (letters, blank count).
+        self.blank_words_cache = LruCache(self.BLANK_WORDS_CACHE_SIZE)
+
+        # Solutions of lines of boards, see Board.generate_solutions_in_line_cached().
+        # None unless turned on with set_line_cache_size().
+        self.line_cache = None
+
+        # From word to its id, for quick lookup.
+        self.word_ids = {}
 
-        # Same as above, but with one letter removed in the key. The word "JELLO" would
-        # appear in the list for the keys "JLO", "ELO", "EJO", and "EJL". This
-        # is for looking up words when you have one blank tile.
-        self.letters_map_one_blank = collections.defaultdict(list)
+        # Word graph for anchor-based move generation. Built on first use
+        # by get_dawg() since most callers don't need it.
+        self.dawg = None
 
-        # Same as above, but with two letters removed in the key. The word "JELLO" would
-        # appear in the list for the keys "LO", "JO", "JL", "EO", "EL", and "EJ".
-        # This is for looking up words when you have two blank tiles.
-        self.letters_map_two_blanks = collections.defaultdict(list)
+        # Positional index of the words. Built on first use by get_positional_index().
+        self.positional_index = None
 
-        # Set of all words for quick lookup.
-        self.word_set = set()
+        # Words as NumPy arrays for Board.generate_solutions_in_line_numpy(). Built
+        # on first use by get_word_matrices().
+        self.word_matrices = None
+
+        # Function that returns the positional index read from the compiled index
+        # file, or None if it has to be built from the words.
+        self.positional_index_loader = None
 
     @staticmethod
-    def load(filename):
+    def load(filename, index_filename=None):
         """Load the dictionary from a file. The file must be whitespace-separated words.
-        Creates the data structures."""
+        Creates the data structures, or reads them from the compiled index file if
+        it's up to date. The index defaults to the filename with ".index" appended
+        and is rebuilt if it's missing or stale. Pass False to not use an index.
+
+        With an up-to-date index only the word list is read here, which is enough
+        for has_word(). The other structures are read from the file on first use."""
 
-        print "Loading dictionary..."
+        before = time.time()
         dictionary = Dictionary()
-        print "    Loading file..."
-        whole_file = file(filename).read().upper()
-        print "    Splitting file..."
-        words = whole_file.split()
-        print "    Removing unsuitable words..."
+        contents = file(filename).read()
+
+        if index_filename is None:
+            index_filename = filename + ".index"
+        if index_filename:
+            key = dictionary_index.compute_key(contents, Board.SIZE)
+            index = dictionary_index.read_index(index_filename, key)
+            if index:
+                dictionary.words, letter_maps, dictionary.positional_index_loader = index
+                dictionary.letters_map = letter_maps["letters_map"]
+                dictionary.word_ids = dictionary.get_word_ids(dictionary.words)
+                if instrumentation.enabled:
+                    instrumentation.count("index_loads")
+                    instrumentation.add_time("load", time.time() - before)
+                return dictionary
+
+        words = contents.upper().split()
         words = dictionary.remove_unsuitable_words(words)
-        print "    Building data structures..."
         dictionary.set_words(words)
 
-        print "    Loaded %d words" % len(dictionary.words)
-        print "    Unique letter size:"
-        print "        No blanks: %d" % len(dictionary.letters_map)
-        print "        One blank: %d" % len(dictionary.letters_map_one_blank)
-        print "        Two blanks: %d" % len(dictionary.letters_map_two_blanks)
+        if index_filename:
+            try:
+                dictionary_index.write_index(index_filename, key, dictionary)
+            except EnvironmentError:
+                # Not fatal, we'll just rebuild next time.
+                if instrumentation.enabled:
+                    instrumentation.count("index_write_failures")
+
+        if instrumentation.enabled:
+            instrumentation.count("index_builds")
+            instrumentation.add_time("load", time.time() - before)
 
         return dictionary
 
     def set_words(self, words):
         """Given a list of upper-case words, generates the internal data structures."""
 
-        self.words = words
+        self.words = sorted(words, key=len)
         self.generate_letter_maps()
-        self.word_set = set(self.words)
+        self.word_ids = self.get_word_ids(self.words)
+        self.dawg = None
+        self.positional_index = None
+        self.positional_index_loader = None
+        self.word_matrices = None
+        self.blank_words_cache.clear()
+        if self.line_cache is not None:
+            self.line_cache.clear()
+
+    def set_line_cache_size(self, size):
+        """Keeps the solutions of up to "size" lines of boards (see
+        Board.generate_solutions_in_line_cached()), or none if "size" is 0, which is
+        the default. This only pays off when the same rack is tried on boards that
+        differ by a move or two, such as one rack against many replies. Otherwise
+        every lookup misses and the cache only holds on to memory."""
+
+        self.line_cache = LruCache(size) if size else None
+
+    @staticmethod
+    def get_word_ids(words):
+        """Returns a dict from each word in the list to its index."""
+
+        return dict(itertools.izip(words, xrange(len(words))))
 
     @staticmethod
     def remove_unsuitable_words(words):
@@ -72,44 +144,72 @@ class Dictionary(object):
         return [word for word in words if word and "-" not in word and len(word) <= max_length]
 
     def generate_letter_maps(self):
-        """Generate the maps from the used letters to the list of words."""
+        """Generate the map from the used letters to the ids of the words."""
+
+        self.letters_map = LettersMap.build(self.words)
+
+    def get_dawg(self):
+        """Returns the word graph of all words, building it if necessary."""
+
+        if self.dawg is None:
+            self.dawg = Dawg(self.words)
+
+        return self.dawg
 
-        word_count = len(self.words)
-        last_percent = 0
+    def get_positional_index(self):
+        """Returns the positional index of all words, reading it from the index file
+        or building it if necessary."""
 
-        # Do no-blank words.
-        for i, word in enumerate(self.words):
-            letters = "".join(sorted(set(word)))
-            self.letters_map[letters].append(word)
+        if self.positional_index is None:
+            if self.positional_index_loader is not None:
+                self.positional_index = self.positional_index_loader()
+            else:
+                self.positional_index = PositionalIndex(self.words)
 
-            # Do one-blank words.
-            for subword in self.remove_one_letter(letters):
-                self.letters_map_one_blank[subword].append(word)
+        return self.positional_index
 
-            # Do two-blank words.
-            for subword in self.remove_two_letters(letters):
-                self.letters_map_two_blanks[subword].append(word)
+    def get_word_matrices(self):
+        """Returns the words as NumPy arrays (see WordMatrices), building them if
+        necessary. Needs NumPy."""
 
-            # Show progress information.
-            percent = int(i*100/word_count)
-            if percent/10 != last_percent/10:
-                print "    %d%%" % percent
-                last_percent = percent
+        if self.word_matrices is None:
+            self.word_matrices = WordMatrices(self.words, self.get_positional_index())
+
+        return self.word_matrices
+
+    def get_blank_words(self, letters, blank_count):
+        """Returns a dict from word length to the bitset (see PositionalIndex) of the
+        words that can be made from the letters in the "letters" mask plus
+        "blank_count" (1 or 2) blank tiles. A word must have more distinct letters than
+        there are blanks. These are the words found by looking up every non-empty
+        subset of "letters" in maps keyed by each word's letters with "blank_count"
+        of them removed, which is how blanks used to be handled. The results are
+        computed from the positional index and the most recent ones are cached."""
+
+        key = letters, blank_count
+        blank_words = self.blank_words_cache.get(key)
+        if blank_words is None:
+            positional_index = self.get_positional_index()
+            blank_words = positional_index.get_formable_bits(letters, blank_count)
+            for length, bits in blank_words.iteritems():
+                for distinct in range(blank_count + 1):
+                    bits &= ~positional_index.distinct_bits[length][distinct]
+                blank_words[length] = bits
+            self.blank_words_cache.put(key, blank_words)
+            if instrumentation.enabled:
+                instrumentation.count("blank_words_cache_misses")
+        elif instrumentation.enabled:
+            instrumentation.count("blank_words_cache_hits")
+
+        return blank_words
 
     def has_word(self, word):
         """Returns whether the word is valid for Scrabble."""
-        return word in self.word_set
+        return word in self.word_ids
 
     @staticmethod
-    def remove_one_letter(word):
-        """Returns a sequence of words from "word" with each letter missing."""
-        for i in range(len(word)):
-            yield word[:i] + word[i + 1:]
+    def get_letters_mask(letters):
+        """Returns the set of unique letters in "letters" as an integer mask of
+        LETTER_BITS. Blanks are ignored."""
 
-    @staticmethod
-    def remove_two_letters(word):
-        """Returns a sequence of words from "word" with pairs of letters missing."""
-        for i in range(len(word) - 1):
-            first_part = word[:i]
-            for j in range(i + 1, len(word)):
-                yield first_part + word[i + 1:j] + word[j + 1:]
+        return get_letters_mask(letters)
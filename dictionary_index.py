@@ -0,0 +1,184 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Reads and writes the compiled dictionary index, an on-disk copy of the
+dictionary's data structures so that they don't have to be rebuilt every time
+the program starts.
+
+The file starts with a header line:
+
+    SCRABBLE-INDEX <version> <key>
+
+where the key is a hash of the source word list and the board size. Then comes a
+table of contents with the (offset, length) of each section, as little-endian
+64-bit integers. The first section is the newline-separated list of words. Each
+letter map then has three sections: an array of its sorted keys (letter masks), an
+array of offsets into its postings (one more than the number of keys), and the postings
+themselves, which are indices into the word list. Arrays are little-endian
+unsigned 32-bit integers. Last comes a section for each word length up to the
+board size with the positional index's bitsets of the words of that length (see
+PositionalIndex.get_length_data()).
+
+The file is opened with mmap and sections are only read when first used, so that
+only the word list has to be read before the first move."""
+
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from board import Board
+from letters_map import LettersMap
+from positional_index import PositionalIndex
+
+MAGIC = "SCRABBLE-INDEX"
+
+# Bump this when the file format or the data structures change.
+VERSION = 6
+
+# Names of the letter maps stored in the file, in order.
+LETTER_MAP_NAMES = ["letters_map"]
+
+# Number of sections in the file.
+SECTION_COUNT = 1 + 3*len(LETTER_MAP_NAMES) + Board.SIZE
+
+# Format of the table of contents.
+TOC_FORMAT = "<" + "QQ"*SECTION_COUNT
+
+def compute_key(contents, board_size):
+    """Returns the key that identifies an index built from the given file contents
+    for the given board size."""
+
+    return hashlib.sha1("%d\n%s" % (board_size, contents)).hexdigest()
+
+def _to_little_endian(values):
+    """Returns an array of unsigned 32-bit integers as a little-endian string."""
+
+    values = array.array("I", values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tostring()
+
+def _from_little_endian(data):
+    """Inverse of _to_little_endian()."""
+
+    values = array.array("I")
+    values.fromstring(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def write_index(filename, key, dictionary):
+    """Write the dictionary's data structures to the file. The file is written
+    to a temporary file first and renamed so that readers never see a partial
+    index."""
+
+    sections = ["\n".join(dictionary.words)]
+    for name in LETTER_MAP_NAMES:
+        sections.extend(_to_little_endian(values)
+                for values in getattr(dictionary, name).get_arrays())
+
+    positional_index = dictionary.get_positional_index()
+    for length in range(1, Board.SIZE + 1):
+        if length in positional_index.counts:
+            sections.append(positional_index.get_length_data(length))
+        else:
+            sections.append("")
+
+    header = "%s %d %s\n" % (MAGIC, VERSION, key)
+
+    # Lay out the sections after the header and table of contents.
+    toc = []
+    offset = len(header) + struct.calcsize(TOC_FORMAT)
+    for section in sections:
+        toc.extend([offset, len(section)])
+        offset += len(section)
+
+    temp_filename = "%s.%d.tmp" % (filename, os.getpid())
+    f = open(temp_filename, "wb")
+    try:
+        f.write(header)
+        f.write(struct.pack(TOC_FORMAT, *toc))
+        for section in sections:
+            f.write(section)
+    finally:
+        f.close()
+    os.rename(temp_filename, filename)
+
+def read_index(filename, key):
+    """Open the index file and return a tuple of the word list, a dict from the
+    names in LETTER_MAP_NAMES to CompiledLettersMap objects, and a function that
+    returns the positional index, decoding it from the file as it's used. The
+    function is called only when the index is first needed, since creating it
+    means a pass over the words. Returns None if the
+    file doesn't exist, is corrupt, or was built from a different word list or
+    format version."""
+
+    try:
+        f = open(filename, "rb")
+    except IOError:
+        return None
+
+    try:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            # Empty or unmappable file.
+            return None
+    finally:
+        # The map stays valid after the file is closed.
+        f.close()
+
+    header = mm.readline()
+    if header != "%s %d %s\n" % (MAGIC, VERSION, key):
+        mm.close()
+        return None
+
+    toc_size = struct.calcsize(TOC_FORMAT)
+    if len(mm) < len(header) + toc_size:
+        mm.close()
+        return None
+    toc = struct.unpack(TOC_FORMAT, mm[len(header):len(header) + toc_size])
+    sections = [(toc[i], toc[i + 1]) for i in range(0, len(toc), 2)]
+    for offset, length in sections:
+        if offset + length > len(mm):
+            mm.close()
+            return None
+
+    offset, length = sections[0]
+    words = mm[offset:offset + length].split("\n")
+
+    letter_maps = {}
+    for i, name in enumerate(LETTER_MAP_NAMES):
+        letter_maps[name] = CompiledLettersMap(words, mm, sections[1 + 3*i:4 + 3*i])
+
+    # Sections of the word lengths, by length.
+    length_sections = [None] + sections[1 + 3*len(LETTER_MAP_NAMES):]
+
+    def get_length_data(length):
+        offset, size = length_sections[length]
+        return mm[offset:offset + size]
+
+    def get_positional_index():
+        return PositionalIndex(words, get_length_data)
+
+    return words, letter_maps, get_positional_index
+
+class CompiledLettersMap(LettersMap):
+    """LettersMap backed by sections of the index file. Nothing is read from the
+    file until first use."""
+
+    def __init__(self, words, mm, sections):
+        LettersMap.__init__(self, words, None, None, None)
+        self._mm = mm
+        self._sections = sections
+
+    def _load(self):
+        """Read our sections from the file."""
+
+        mm = self._mm
+        self._keys, self._offsets, self._postings = [
+                _from_little_endian(mm[offset:offset + length])
+                for offset, length in self._sections]
+        LettersMap._load(self)
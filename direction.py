@@ -10,6 +10,9 @@ class Direction(object):
         self.drow = drow
         self.dcol = dcol
 
+        # Index of this direction in DIRECTIONS, for tables kept per direction.
+        self.index = drow
+
     def increment(self, row, col, distance=1):
         """Return a (row,col) pair based on the given pair and a distance and
         this direction."""
@@ -33,6 +36,12 @@ class Direction(object):
 
         return self.drow*pos + self.dcol*line, self.dcol*pos + self.drow*line
 
+    def get_line_position(self, row, col):
+        """Inverse of get_absolute_position(): returns a (pos,line) pair for the
+        given square."""
+
+        return self.drow*row + self.dcol*col, self.dcol*row + self.drow*col
+
     def get_relative_position(self, row, col, dpos, dline):
         """Same as get_absolute_position() but relative to the given position."""
 
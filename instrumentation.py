@@ -0,0 +1,102 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Counters and timers for the stages of the engine. The engine reports to this
+module, which passes the reports on to listeners. A listener is any callable that
+takes (kind, name, value), where kind is COUNT or TIME. Stats is a listener that
+adds everything up. For example:
+
+    with instrumentation.collect() as stats:
+        solutions = board.generate_solutions(rack, dictionary)
+    print stats
+
+When there are no listeners the engine skips its reporting, so it costs a check of
+"enabled" per stage."""
+
+import collections
+import contextlib
+
+# Kinds of reports.
+COUNT = "count"
+TIME = "time"
+
+# Whether anyone is listening. The engine checks this before reporting.
+enabled = False
+
+# Callables that get every report.
+_listeners = []
+
+def add_listener(listener):
+    """Start sending reports to the listener."""
+
+    global enabled
+    _listeners.append(listener)
+    enabled = True
+
+def remove_listener(listener):
+    """Stop sending reports to the listener."""
+
+    global enabled
+    _listeners.remove(listener)
+    enabled = bool(_listeners)
+
+def count(name, value=1):
+    """Report that "value" more of "name" happened."""
+
+    for listener in _listeners:
+        listener(COUNT, name, value)
+
+def add_time(name, seconds):
+    """Report that the "name" stage took this many seconds."""
+
+    for listener in _listeners:
+        listener(TIME, name, seconds)
+
+@contextlib.contextmanager
+def collect():
+    """Context manager that listens with a new Stats object for the duration
+    of the block."""
+
+    stats = Stats()
+    add_listener(stats)
+    try:
+        yield stats
+    finally:
+        remove_listener(stats)
+
+class Stats(object):
+    """Listener that keeps the total of each counter and timer."""
+
+    def __init__(self):
+        # From name to total.
+        self.counters = collections.defaultdict(int)
+
+        # From name to total seconds.
+        self.timers = collections.defaultdict(float)
+
+    def __call__(self, kind, name, value):
+        if kind == COUNT:
+            self.counters[name] += value
+        elif kind == TIME:
+            self.timers[name] += value
+
+    def reset(self):
+        """Clear all counters and timers."""
+
+        self.counters.clear()
+        self.timers.clear()
+
+    def as_dict(self):
+        """Returns the counters and timers as a dict suitable for JSON."""
+
+        return {
+            "counters": dict(self.counters),
+            "timers": dict(self.timers),
+        }
+
+    def __str__(self):
+        lines = []
+        for name, value in sorted(self.counters.iteritems()):
+            lines.append("%s: %d" % (name, value))
+        for name, value in sorted(self.timers.iteritems()):
+            lines.append("%s: %.3fs" % (name, value))
+        return "\n".join(lines)
@@ -0,0 +1,117 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Map from a set of letters to the words made of exactly those letters, stored as
+word ids in flat arrays rather than as lists of strings."""
+
+import array
+import collections
+
+from solution import LETTER_BITS
+
+def get_letters_mask(letters):
+    """Returns the set of unique letters in "letters" as an integer mask of
+    LETTER_BITS. Blanks are ignored."""
+
+    mask = 0
+    for ch in letters:
+        mask |= LETTER_BITS.get(ch, 0)
+
+    return mask
+
+class LettersMap(object):
+    """Read-only map from a letter mask (see get_letters_mask()) to the ids of the
+    words with exactly those letters. The ids of all keys are stored back to back
+    in one array of postings, with an array of offsets giving where each key's ids
+    start. Looking up a missing key returns an empty list, like a defaultdict."""
+
+    def __init__(self, words, keys, offsets, postings):
+        """The keys are sorted and the ids of key "keys[i]" are
+        postings[offsets[i]:offsets[i + 1]]. The ids are indices into "words"."""
+
+        self.words = words
+        self._keys = keys
+        self._offsets = offsets
+        self._postings = postings
+
+        # From key to its position in the keys array. None until _load() is called.
+        self._slots = None
+
+    @classmethod
+    def build(cls, words):
+        """Returns the map of the given list of words."""
+
+        ids_by_key = collections.defaultdict(list)
+        for word_id, word in enumerate(words):
+            ids_by_key[get_letters_mask(word)].append(word_id)
+
+        keys = array.array("I", sorted(ids_by_key))
+        offsets = array.array("I", [0])
+        postings = array.array("I")
+        for key in keys:
+            postings.extend(ids_by_key[key])
+            offsets.append(len(postings))
+
+        return cls(words, keys, offsets, postings)
+
+    def _load(self):
+        """Make the map ready for lookups."""
+
+        self._slots = dict((key, slot) for slot, key in enumerate(self._keys))
+
+    def get_arrays(self):
+        """Returns the keys, offsets, and postings arrays."""
+
+        if self._slots is None:
+            self._load()
+
+        return self._keys, self._offsets, self._postings
+
+    def get_ids(self, key, default=None):
+        """Returns an array of the ids of the words with the letters of "key", or
+        "default" if there are none."""
+
+        if self._slots is None:
+            self._load()
+
+        slot = self._slots.get(key)
+        if slot is None:
+            return default
+
+        return self._postings[self._offsets[slot]:self._offsets[slot + 1]]
+
+    def __getitem__(self, key):
+        words = self.words
+        return [words[word_id] for word_id in self.get_ids(key, ())]
+
+    def get(self, key, default=None):
+        if self._slots is None:
+            self._load()
+
+        if key in self._slots:
+            return self[key]
+        else:
+            return default
+
+    def __contains__(self, key):
+        if self._slots is None:
+            self._load()
+
+        return key in self._slots
+
+    def __len__(self):
+        if self._slots is None:
+            self._load()
+
+        return len(self._slots)
+
+    def iterkeys(self):
+        if self._slots is None:
+            self._load()
+
+        return self._slots.iterkeys()
+
+    __iter__ = iterkeys
+
+    def iteritems(self):
+        for key in self.iterkeys():
+            yield key, self[key]
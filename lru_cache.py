@@ -0,0 +1,61 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""A dict-like cache that keeps only the most recently used entries."""
+
+import collections
+
+class LruCache(object):
+    """Maps keys to values, keeping at most "capacity" entries. When full, adding an
+    entry evicts the one that was least recently looked up or added. Keeps count of
+    hits, misses, and evictions."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+        # From key to value, least recently used first.
+        self._entries = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the value for the key and marks it as recently used, or returns
+        "default" if it's not in the cache."""
+
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Adds or replaces the value for the key, evicting the least recently used
+        entry if the cache is full."""
+
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Removes all entries. The statistics are kept."""
+
+        self._entries.clear()
+
+    def itervalues(self):
+        """Returns an iterator over the values, least recently used first. Doesn't
+        count as using them."""
+
+        return self._entries.itervalues()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,122 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Transposition cache of move generation results, for workloads that ask about the
+same position more than once, such as re-analysing a game or trying many racks on
+the same boards."""
+
+import sys
+
+from board import GENERATOR_SUBSETS
+from lru_cache import LruCache
+from solution import Solution
+import instrumentation
+
+# Best move of a cache entry whose best move hasn't been looked for yet.
+_UNKNOWN = object()
+
+class MoveCache(object):
+    """Caches the solutions and best move of (board, rack) pairs for one dictionary.
+    Positions are keyed by the board's Zobrist hash, the sorted rack, and the
+    generator, so boards that got the same tiles in a different order share an
+    entry, as do racks with the same tiles. Keeps the most recently used
+    "capacity" positions."""
+
+    # Default number of positions to keep.
+    DEFAULT_CAPACITY = 256
+
+    def __init__(self, dictionary, capacity=DEFAULT_CAPACITY):
+        self.dictionary = dictionary
+
+        # From (board hash, sorted rack, generator) to a list of the solutions for
+        # the sorted rack and the best of them (None if there are none, _UNKNOWN if
+        # it hasn't been looked for).
+        self.cache = LruCache(capacity)
+
+    def _get_entry(self, board, rack, generator):
+        """Returns the entry for the position, generating its solutions if it's not
+        in the cache."""
+
+        sorted_rack = "".join(sorted(rack))
+        key = board.hash, sorted_rack, generator
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = [board.generate_solutions(sorted_rack, self.dictionary, generator),
+                    _UNKNOWN]
+            self.cache.put(key, entry)
+            if instrumentation.enabled:
+                instrumentation.count("move_cache_misses")
+        elif instrumentation.enabled:
+            instrumentation.count("move_cache_hits")
+
+        return entry
+
+    @staticmethod
+    def _for_rack(solution, rack):
+        """Returns the solution, which was generated for the sorted rack, with its
+        rack indices changed to refer to "rack"."""
+
+        if list(rack) == sorted(rack):
+            return solution
+
+        # Index in "rack" of each tile of the sorted rack.
+        rack_order = sorted(range(len(rack)), key=rack.__getitem__)
+
+        copy = Solution(solution.row, solution.col, solution.direction, solution.word,
+                solution.word_blank_indices,
+                sorted(rack_order[rack_index] for rack_index in solution.rack_indices))
+        copy.score = solution.score
+        return copy
+
+    def generate_solutions(self, board, rack, generator=GENERATOR_SUBSETS):
+        """Same as Board.generate_solutions() but uses the cache. The solutions
+        may be shared with other callers, so they must not be modified, except by
+        scoring them."""
+
+        solutions = self._get_entry(board, rack, generator)[0]
+        return [self._for_rack(solution, rack) for solution in solutions]
+
+    def find_best_move(self, board, rack, generator=GENERATOR_SUBSETS):
+        """Returns the best solution for the rack on the board, or None if there are
+        none, using the cache."""
+
+        entry = self._get_entry(board, rack, generator)
+        if entry[1] is _UNKNOWN:
+            entry[1] = board.find_best_solution_bounded(entry[0], self.dictionary)
+
+        best_solution = entry[1]
+        if best_solution is None:
+            return None
+
+        return self._for_rack(best_solution, rack)
+
+    def clear(self):
+        """Removes all positions. The statistics are kept."""
+
+        self.cache.clear()
+
+    def get_stats(self):
+        """Returns a dict of the number of positions and solutions in the cache, an
+        estimate of the memory they use in bytes, and the cache's hits, misses,
+        evictions, and hit rate."""
+
+        solution_count = 0
+        size = 0
+        for solutions, best_solution in self.cache.itervalues():
+            solution_count += len(solutions)
+            size += sys.getsizeof(solutions)
+            for solution in solutions:
+                size += sys.getsizeof(solution) \
+                        + sys.getsizeof(solution.word_blank_indices) \
+                        + sys.getsizeof(solution.rack_indices)
+
+        lookups = self.cache.hits + self.cache.misses
+
+        return {
+            "positions": len(self.cache),
+            "solutions": solution_count,
+            "bytes": size,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "evictions": self.cache.evictions,
+            "hit_rate": float(self.cache.hits)/lookups if lookups else 0.0,
+        }
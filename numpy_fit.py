@@ -0,0 +1,120 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Checks which of many words fit at which positions of a line all at once with
+NumPy, for Board.generate_solutions_in_line_numpy(). NumPy is optional: the rest
+of the program works without it, and is_available() says whether this module
+can be used.
+
+Lines and words are arrays of uint8 letter codes, as in Board.cells: the ASCII
+code of the letter, or 0 for an empty square."""
+
+import binascii
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from bag import BLANK_SLOT, RACK_SLOTS
+
+def is_available():
+    """Returns whether NumPy is installed."""
+
+    return numpy is not None
+
+def get_ranks(bits, count):
+    """Returns an array of the set bits, in increasing order, of a bitset (see
+    PositionalIndex) of "count" words."""
+
+    if not bits:
+        return numpy.zeros(0, dtype=numpy.intp)
+
+    # Least significant byte first, and within each byte least significant bit first.
+    size = (count + 7)//8
+    data = binascii.unhexlify("%0*x" % (size*2, bits))[::-1]
+    flags = numpy.unpackbits(numpy.frombuffer(data, dtype=numpy.uint8))
+    return numpy.flatnonzero(flags.reshape(-1, 8)[:, ::-1].ravel()[:count])
+
+class WordMatrices(object):
+    """The words of a dictionary as one 2-D uint8 array per word length, with a row
+    for each word in id order and a column for each letter."""
+
+    def __init__(self, words, positional_index):
+        if numpy is None:
+            raise ImportError("NumPy is not installed")
+
+        self.words = words
+        self.positional_index = positional_index
+
+        # From word length to its matrix. Filled in by get_matrix().
+        self.matrices = {}
+
+    def get_matrix(self, length):
+        """Returns the matrix of the words of the given length. Row "i" is the word
+        whose rank (see PositionalIndex) is "i"."""
+
+        matrix = self.matrices.get(length)
+        if matrix is None:
+            start = self.positional_index.starts[length]
+            count = self.positional_index.counts[length]
+            data = "".join(self.words[start:start + count])
+            matrix = numpy.frombuffer(data, dtype=numpy.uint8).reshape(count, length)
+            self.matrices[length] = matrix
+
+        return matrix
+
+def find_fits(matrix, ranks, line, positions, rack_counts):
+    """Given the matrix of the words of one length, the ranks of the words to try,
+    a bytearray of the letter codes of the squares of a line, the positions in the
+    line to try, and the rack as a list of counts (see get_rack_counts()), returns
+    the positions and ranks of the (position, word) pairs where the word fits: it
+    matches the tiles already on the line, covers at least one empty square, and
+    the rack has the letters, or blanks in their place, for the empty squares it
+    covers. The pairs are ordered by position and then by rank, and both are
+    returned as lists of ints."""
+
+    empty_result = (), ()
+    length = matrix.shape[1]
+    tile_count = sum(rack_counts)
+    if not len(ranks) or not positions or not tile_count:
+        return empty_result
+
+    # The squares covered at each position, one row per position.
+    line = numpy.frombuffer(line, dtype=numpy.uint8)
+    positions = numpy.array(positions)
+    squares = line[positions[:, None] + numpy.arange(length)]
+    empty = squares == 0
+
+    # The number of rack tiles needed at each position is the number of empty
+    # squares, the same for every word. Drop the positions that need none or more
+    # than we have.
+    needed = empty.sum(axis=1)
+    keep = (needed > 0) & (needed <= tile_count)
+    positions = positions[keep]
+    squares = squares[keep]
+    empty = empty[keep]
+    if not len(positions):
+        return empty_result
+
+    # Tile mismatches of every word at every position.
+    words = matrix[ranks]
+    mismatch = ((words[None, :, :] != squares[:, None, :]) & ~empty[:, None, :]).any(axis=2)
+    position_indices, word_indices = numpy.nonzero(~mismatch)
+    if not len(position_indices):
+        return empty_result
+
+    # For each remaining pair, count the letters of the word that go on empty
+    # squares, with the other squares counted in the blank slot, which is ignored.
+    letters = words[word_indices].astype(numpy.intp) - ord("A")
+    letters[~empty[position_indices]] = BLANK_SLOT
+    pair_count = len(word_indices)
+    letters += RACK_SLOTS*numpy.arange(pair_count)[:, None]
+    letter_counts = numpy.bincount(letters.ravel(),
+            minlength=RACK_SLOTS*pair_count).reshape(pair_count, RACK_SLOTS)
+
+    # Blanks needed for the letters the rack doesn't have enough of.
+    have = numpy.array(rack_counts[:BLANK_SLOT])
+    blank_demand = numpy.maximum(letter_counts[:, :BLANK_SLOT] - have, 0).sum(axis=1)
+    fits = blank_demand <= rack_counts[BLANK_SLOT]
+
+    return positions[position_indices[fits]].tolist(), ranks[word_indices[fits]].tolist()
@@ -0,0 +1,211 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Scores many candidates (see get_candidate_score()) for the same board at once
+with NumPy, for the GENERATOR_NUMPY move generator. Gives exactly the scores of
+get_candidate_score(). NumPy is optional; see numpy_fit.is_available()."""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from board_exceptions import MismatchLetterError, OutsideError
+from direction import DIRECTIONS
+from solution import LETTER_BITS, LETTER_SCORE, SCRABBLE_BONUS
+
+# Number of candidates that Board.find_best_candidate_batched() scores at once.
+BATCH_SIZE = 4096
+
+def _get_runs(board, indices):
+    """Given the cell indices of a line of the board, in either direction, returns a
+    list of (index, tiles, score) tuples: for each square, the letters of the tiles
+    just before it, in the order of "indices", and their score without blanks."""
+
+    runs = []
+    tiles = ""
+    score = 0
+    for index in indices:
+        runs.append((index, tiles, score))
+        cell = board.cells[index]
+        if cell:
+            tiles += chr(cell)
+            if not board.blanks >> index & 1:
+                score += LETTER_SCORE[chr(cell)]
+        else:
+            tiles = ""
+            score = 0
+
+    return runs
+
+class BatchScorer(object):
+    """Scores candidates for one board. The board must not change while the scorer
+    is used."""
+
+    def __init__(self, board, dictionary):
+        if numpy is None:
+            raise ImportError("NumPy is not installed")
+
+        board.update_cross_checks(dictionary)
+
+        self.board = board
+        self.dictionary = dictionary
+
+        size = board.SIZE
+        cell_count = board.CELL_COUNT
+
+        # Tables by cell index, with one more cell past the end of the board that
+        # the letters after the end of shorter words are put on. It's a square
+        # with a tile on it that isn't a blank and that counts for nothing.
+        self.pad_index = cell_count
+        self.cells = numpy.zeros(cell_count + 1, dtype=numpy.uint8)
+        self.cells[:cell_count] = numpy.frombuffer(bytes(board.cells), dtype=numpy.uint8)
+        self.cells[cell_count] = 1
+        self.board_blanks = numpy.array([board.blanks >> index & 1
+            for index in range(cell_count)] + [0], dtype=bool)
+        self.letter_multipliers = numpy.array(board.LETTER_MULTIPLIERS + [1])
+        self.word_multipliers = numpy.array(board.WORD_MULTIPLIERS + [1])
+
+        # Tables by direction index and cell index, like the board's cross-checks.
+        self.cross_checks = numpy.array([cross_checks + [0]
+            for cross_checks in board.cross_checks], dtype=numpy.int64)
+        self.has_cross_scores = numpy.array([[score is not None for score in scores]
+            + [False] for scores in board.cross_scores])
+        self.cross_scores = numpy.array([[score or 0 for score in scores] + [0]
+            for scores in board.cross_scores])
+
+        # Also by direction index and cell index, the tiles just before and just
+        # after the square along the direction, for words that extend a word on the
+        # board, and the numbers and scores of those tiles.
+        self.prefixes = []
+        self.suffixes = []
+        self.prefix_lengths = numpy.zeros((len(DIRECTIONS), cell_count + 1), dtype=int)
+        self.suffix_lengths = numpy.zeros((len(DIRECTIONS), cell_count + 1), dtype=int)
+        self.prefix_scores = numpy.zeros((len(DIRECTIONS), cell_count + 1), dtype=int)
+        self.suffix_scores = numpy.zeros((len(DIRECTIONS), cell_count + 1), dtype=int)
+        for direction in DIRECTIONS:
+            prefixes = [""]*(cell_count + 1)
+            suffixes = [""]*(cell_count + 1)
+            for line_indices in board.LINE_INDICES[direction.index]:
+                for index, tiles, score in _get_runs(board, line_indices):
+                    prefixes[index] = tiles
+                    self.prefix_lengths[direction.index, index] = len(tiles)
+                    self.prefix_scores[direction.index, index] = score
+                for index, tiles, score in _get_runs(board, line_indices[::-1]):
+                    suffixes[index] = tiles[::-1]
+                    self.suffix_lengths[direction.index, index] = len(tiles)
+                    self.suffix_scores[direction.index, index] = score
+            self.prefixes.append(prefixes)
+            self.suffixes.append(suffixes)
+
+        # Tables by letter code.
+        self.letter_scores = numpy.zeros(256, dtype=int)
+        self.letter_bits = numpy.zeros(256, dtype=numpy.int64)
+        for ch, score in LETTER_SCORE.iteritems():
+            self.letter_scores[ord(ch)] = score
+            self.letter_bits[ord(ch)] = LETTER_BITS[ch]
+
+        # By direction index.
+        self.drows = numpy.array([direction.drow for direction in DIRECTIONS])
+        self.dcols = numpy.array([direction.dcol for direction in DIRECTIONS])
+        self.steps = self.drows*size + self.dcols
+
+    def score(self, candidates):
+        """Returns a list of the scores of the candidates, None for those that
+        aren't legal. Raises the exceptions that get_candidate_score() would."""
+
+        if not candidates:
+            return []
+
+        size = self.board.SIZE
+        count = len(candidates)
+        rows, cols, directions, words, blank_masks, rack_masks = zip(*candidates)
+        rows = numpy.fromiter(rows, int, count)
+        cols = numpy.fromiter(cols, int, count)
+        direction_indices = numpy.fromiter((direction.index for direction in directions),
+                int, count)
+        blank_masks = numpy.fromiter(blank_masks, int, count)
+        rack_masks = numpy.fromiter(rack_masks, int, count)
+
+        # Letter codes of the words, one row per word, padded with zeros.
+        codes = numpy.array(words)
+        max_length = codes.itemsize
+        codes = codes.view(numpy.uint8).reshape(count, max_length)
+        lengths = (codes != 0).sum(axis=1)
+
+        drows = self.drows[direction_indices]
+        dcols = self.dcols[direction_indices]
+        if ((rows + drows*(lengths - 1) >= size) | (cols + dcols*(lengths - 1) >= size)).any():
+            raise OutsideError()
+
+        # Cell index of each letter of each word.
+        offsets = numpy.arange(max_length)
+        in_word = offsets < lengths[:, None]
+        first_indices = rows*size + cols
+        last_indices = first_indices + self.steps[direction_indices]*(lengths - 1)
+        indices = numpy.where(in_word, first_indices[:, None]
+                + self.steps[direction_indices][:, None]*offsets, self.pad_index)
+
+        cells = self.cells[indices]
+        is_new = cells == 0
+        is_word_blank = (blank_masks[:, None] >> offsets) & 1 == 1
+        letter_scores = self.letter_scores[codes]
+        new_letter_scores = numpy.where(is_word_blank, 0, letter_scores) \
+                * self.letter_multipliers[indices]
+
+        # The tiles we're adding must make legal perpendicular words. A candidate
+        # with a tile that doesn't match the board is an error, unless one of these
+        # comes first.
+        is_illegal = is_new & (self.cross_checks[direction_indices[:, None], indices]
+                & self.letter_bits[codes] == 0)
+        is_mismatch = ~is_new & in_word & (cells != codes)
+        if is_mismatch.any():
+            first_illegal = numpy.where(is_illegal.any(axis=1), is_illegal.argmax(axis=1),
+                    max_length)
+            if (is_mismatch.any(axis=1) & (is_mismatch.argmax(axis=1) < first_illegal)).any():
+                raise MismatchLetterError()
+
+        # Main word, with the tiles already on the board counting without multipliers
+        # unless they're blanks, and the word multipliers of the new tiles.
+        word_scores = numpy.where(is_new, new_letter_scores, 0).sum(axis=1)
+        word_scores += numpy.where(~is_new & ~self.board_blanks[indices] & ~is_word_blank,
+                letter_scores, 0).sum(axis=1)
+        word_scores += self.prefix_scores[direction_indices, first_indices]
+        word_scores += self.suffix_scores[direction_indices, last_indices]
+        word_multipliers = numpy.where(is_new, self.word_multipliers[indices], 1).prod(axis=1)
+
+        # Perpendicular words.
+        has_cross_scores = is_new & self.has_cross_scores[direction_indices[:, None], indices]
+        cross_scores = numpy.where(has_cross_scores,
+                (self.cross_scores[direction_indices[:, None], indices] + new_letter_scores)
+                * self.word_multipliers[indices], 0).sum(axis=1)
+
+        # Bonus for using seven tiles.
+        tile_counts = numpy.zeros(len(candidates), dtype=int)
+        for bit in range(int(rack_masks.max()).bit_length()):
+            tile_counts += (rack_masks >> bit) & 1
+
+        scores = word_scores*word_multipliers + cross_scores \
+                + numpy.where(tile_counts == 7, SCRABBLE_BONUS, 0)
+
+        scores = scores.tolist()
+
+        # The main word, with any tiles at either end, must be in the dictionary.
+        has_word = self.dictionary.has_word
+        prefixes = self.prefixes
+        suffixes = self.suffixes
+        is_legal = ~is_illegal.any(axis=1)
+        is_extended = (self.prefix_lengths[direction_indices, first_indices] > 0) \
+                | (self.suffix_lengths[direction_indices, last_indices] > 0)
+        for i in numpy.flatnonzero(is_legal & ~is_extended).tolist():
+            if not has_word(words[i]):
+                scores[i] = None
+        for i in numpy.flatnonzero(is_legal & is_extended).tolist():
+            direction_index = directions[i].index
+            if not has_word(prefixes[direction_index][first_indices[i]] + words[i]
+                    + suffixes[direction_index][last_indices[i]]):
+
+                scores[i] = None
+        for i in numpy.flatnonzero(~is_legal).tolist():
+            scores[i] = None
+
+        return scores
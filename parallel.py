@@ -0,0 +1,242 @@
+#!/usr/bin/python
+
+# Copyright 2011 Lawrence Kesteloot
+
+"""Spreads move generation and scoring over a pool of worker processes. Each
+(direction, line) pair is an independent job. The dictionary is handed to each
+worker once when the pool starts (it's inherited when the worker is forked) and is
+never sent with the jobs."""
+
+import multiprocessing
+import random
+import sys
+import time
+
+from board import Board, GENERATOR_NUMPY, GENERATOR_SUBSETS
+from direction import DIRECTIONS
+from solution import Solution
+
+# The dictionary of this worker process. Set by _init_worker().
+_dictionary = None
+
+def _init_worker(dictionary):
+    """Runs once in each worker process when the pool starts."""
+
+    global _dictionary
+    _dictionary = dictionary
+
+def _use_worker_dictionary(board):
+    """Lets the board use the cross-checks it was pickled with. The parent brought
+    them up to date with the same dictionary that the worker has."""
+
+    board.cross_check_dictionary = _dictionary
+
+def pack_solution(solution):
+    """Returns a tuple for sending a solution between processes. The direction
+    is sent as its index so that the receiver gets the shared Direction object."""
+
+    return (solution.row, solution.col, solution.direction.index, solution.word,
+            solution.word_blank_indices, solution.rack_indices, solution.score)
+
+def unpack_solution(packed):
+    """Inverse of pack_solution()."""
+
+    row, col, direction_index, word, word_blank_indices, rack_indices, score = packed
+    solution = Solution(row, col, DIRECTIONS[direction_index], word,
+            word_blank_indices, rack_indices)
+    solution.score = score
+    return solution
+
+def _generate_solutions_in_line(job):
+    """Returns the candidates (see get_candidate_score()) of one line, without their
+    direction, which is the job's."""
+
+    board, rack, generator, direction_index, line = job
+    _use_worker_dictionary(board)
+
+    candidates = []
+    board.get_line_generator(generator)(rack, _dictionary, line,
+            DIRECTIONS[direction_index], candidates)
+
+    return [(row, col, word, blank_mask, rack_mask)
+            for row, col, direction, word, blank_mask, rack_mask in candidates]
+
+def _find_best_solution(job):
+    """Scores a chunk of packed solutions and returns a tuple of the index within the
+    chunk and the score of the best one, or None if none are legal."""
+
+    board, packed_solutions = job
+    _use_worker_dictionary(board)
+
+    best = None
+    for i, packed in enumerate(packed_solutions):
+        solution = unpack_solution(packed)
+        solution.determine_score(board, _dictionary)
+        if solution.score > 0 and (best is None or solution.score > best[1]):
+            best = i, solution.score
+
+    return best
+
+def _find_best_move_in_line(job):
+    """Generates and scores the solutions of one line, in batches with
+    GENERATOR_NUMPY like Board.find_best_move(). Returns the packed best solution,
+    or None."""
+
+    board, rack, generator, direction_index, line = job
+    _use_worker_dictionary(board)
+
+    candidates = []
+    board.get_line_generator(generator)(rack, _dictionary, line,
+            DIRECTIONS[direction_index], candidates)
+    if generator == GENERATOR_NUMPY:
+        best = board.find_best_candidate_batched(candidates, _dictionary)
+    else:
+        best = board.find_best_candidate(candidates, _dictionary)
+    if best is None:
+        return None
+
+    candidate, score = best
+    return pack_solution(Solution.from_candidate(candidate, score))
+
+class ParallelSolver(object):
+    """Finds solutions using a pool of worker processes. Gives the same results, in
+    the same order, as the serial methods of Board."""
+
+    def __init__(self, dictionary, workers=None):
+        """Starts "workers" processes (default the number of CPUs), each with the
+        given dictionary."""
+
+        self.dictionary = dictionary
+        self.workers = workers or multiprocessing.cpu_count()
+
+        # Build the positional index before forking so the workers share it.
+        dictionary.get_positional_index()
+        self.pool = multiprocessing.Pool(self.workers, _init_worker, (dictionary,))
+
+    def close(self):
+        """Stops the worker processes."""
+
+        self.pool.close()
+        self.pool.join()
+
+    def _get_line_jobs(self, board, rack, generator):
+        """Returns the jobs for the lines, in the order Board.generate_solutions()
+        goes through them."""
+
+        # So that the workers can use the board's cross-checks.
+        board.update_cross_checks(self.dictionary)
+
+        return [(board, rack, generator, direction.index, line)
+                for direction in DIRECTIONS
+                for line in range(Board.SIZE)]
+
+    def generate_solutions(self, board, rack, generator=GENERATOR_SUBSETS):
+        """Parallel version of Board.generate_solutions()."""
+
+        jobs = self._get_line_jobs(board, rack, generator)
+        solutions = []
+        for job, candidates in zip(jobs, self.pool.map(_generate_solutions_in_line,
+                jobs, chunksize=1)):
+
+            direction = DIRECTIONS[job[3]]
+            solutions.extend(Solution.from_candidate((row, col, direction, word,
+                blank_mask, rack_mask))
+                for row, col, word, blank_mask, rack_mask in candidates)
+
+        return board.remove_duplicate_solutions(solutions)
+
+    def find_best_solution(self, board, solutions):
+        """Parallel version of Board.find_best_solution(). The solutions are split
+        into one chunk per worker. The scores of the solutions are not set, except
+        for the one returned."""
+
+        board.update_cross_checks(self.dictionary)
+
+        chunk_size = max(1, (len(solutions) + self.workers - 1)//self.workers)
+        jobs = [(board, [pack_solution(solution)
+                    for solution in solutions[start:start + chunk_size]])
+                for start in range(0, len(solutions), chunk_size)]
+
+        # Take the first solution with the highest score, like the serial version.
+        best_index = None
+        best_score = None
+        for chunk_index, best in enumerate(self.pool.map(_find_best_solution, jobs)):
+            if best is not None and (best_score is None or best[1] > best_score):
+                best_index = chunk_index*chunk_size + best[0]
+                best_score = best[1]
+
+        if best_index is None:
+            return None
+
+        solution = solutions[best_index]
+        solution.score = best_score
+        return solution
+
+    def find_best_move(self, board, rack, generator=GENERATOR_SUBSETS):
+        """Same as generating the solutions and finding the best one, but each
+        worker scores the solutions of its own lines so they never have to be sent
+        between processes."""
+
+        best_solution = None
+        for packed in self.pool.map(_find_best_move_in_line,
+                self._get_line_jobs(board, rack, generator), chunksize=1):
+
+            if packed is not None:
+                solution = unpack_solution(packed)
+                if best_solution is None or solution.score > best_solution.score:
+                    best_solution = solution
+
+        return best_solution
+
+def main():
+    """Reports the speedup of the parallel solver on a mid-game board. Takes the
+    worker counts to try on the command line."""
+
+    from bag import generate_rack, get_full_bag
+    from dictionary import Dictionary
+
+    worker_counts = [int(arg) for arg in sys.argv[1:]] \
+            or [2, 4, multiprocessing.cpu_count()]
+    dictionary = Dictionary.load("dictionary")
+
+    # Play a few turns to get a mid-game board.
+    random.seed(1)
+    board = Board()
+    bag = get_full_bag()
+    rack = ""
+    for turn in range(6):
+        rack = generate_rack(rack, bag)
+        solution = board.find_best_solution(board.generate_solutions(rack, dictionary),
+                dictionary)
+        if not solution:
+            break
+        board.add_solution(solution)
+        rack = solution.get_new_rack(rack)
+    rack = generate_rack(rack, bag)
+
+    before = time.time()
+    expected = board.find_best_solution(board.generate_solutions(rack, dictionary),
+            dictionary)
+    serial_time = time.time() - before
+
+    results = []
+    for workers in worker_counts:
+        solver = ParallelSolver(dictionary, workers)
+        try:
+            before = time.time()
+            solution = solver.find_best_move(board, rack)
+            elapsed = time.time() - before
+        finally:
+            solver.close()
+        results.append((workers, elapsed, str(solution) == str(expected)))
+
+    print board
+    print "Rack: %s" % rack
+    print "Best: %s" % expected
+    print "Serial: %.2fs" % serial_time
+    for workers, elapsed, is_same in results:
+        print "%d workers: %.2fs (%.1fx speedup)%s" % (workers, elapsed,
+                serial_time/elapsed, "" if is_same else " DIFFERENT BEST MOVE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# Copyright 2011 Lawrence Kesteloot
+
+"""Index from (word length, offset in word, letter) to the words with that letter at
+that offset. Used to find the words that match the tiles already on a line without
+trying every word at every position.
+
+The words must be sorted by length so that the ids (indices into the word list) of
+the words of each length are contiguous. Sets of words of one length are stored
+as bitsets: Python integers where bit "i" is set for the word whose id is "i" more
+than the first id of that length. Intersecting them is then a single "&".
+
+The index also answers which words can be made from a set of letters plus a
+number of blanks, for move generation with blanks in the rack."""
+
+import binascii
+
+from solution import LETTER_BITS
+
+# Most blanks that get_formable_bits() supports.
+MAX_BLANKS = 2
+
+class _LazyDict(dict):
+    """Dict that computes missing values with "compute(key)" on first lookup."""
+
+    def __init__(self, compute):
+        dict.__init__(self)
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+class PositionalIndex(object):
+    """Positional index of a list of words sorted by length."""
+
+    def __init__(self, words, get_length_data=None):
+        """Builds the index of the words. If "get_length_data" is given, the bitsets
+        are instead decoded from what it returns for a word length (see
+        get_length_data()), one length at a time as they're first used."""
+
+        self.words = words
+
+        # From word length to the id of the first word and the number of words of
+        # that length.
+        self.starts = {}
+        self.counts = {}
+        for word_id, word in enumerate(words):
+            length = len(word)
+            if length not in self.starts:
+                self.starts[length] = word_id
+                self.counts[length] = 0
+            elif self.starts[length] + self.counts[length] != word_id:
+                raise ValueError("words are not sorted by length")
+            self.counts[length] += 1
+
+        # From word length to a list, by letter, of bitsets of the words that have
+        # that letter anywhere. Only needed for blanks, so computed on first use.
+        self.letter_bits = _LazyDict(self._get_letter_bits)
+
+        if get_length_data is not None:
+            self._get_length_data = get_length_data
+            self.postings = _LazyDict(self._load_postings)
+            self.distinct_bits = _LazyDict(self._load_distinct_bits)
+            return
+
+        # Bitsets being built, as bytearrays, indexed like postings and distinct_bits
+        # below.
+        postings = {}
+        distinct_bits = {}
+        for length, count in self.counts.iteritems():
+            postings[length] = [[None]*len(LETTER_BITS) for offset in range(length)]
+            distinct_bits[length] = [None]*(MAX_BLANKS + 1)
+
+        for word_id, word in enumerate(words):
+            length = len(word)
+            rank = word_id - self.starts[length]
+            byte_index = rank >> 3
+            bit = 1 << (rank & 7)
+            for offset, ch in enumerate(word):
+                letter_postings = postings[length][offset]
+                letter = ord(ch) - ord("A")
+                bits = letter_postings[letter]
+                if bits is None:
+                    bits = letter_postings[letter] = bytearray((self.counts[length] + 7)//8)
+                bits[byte_index] |= bit
+
+            distinct = len(set(word))
+            if distinct <= MAX_BLANKS:
+                bits = distinct_bits[length][distinct]
+                if bits is None:
+                    bits = distinct_bits[length][distinct] = \
+                            bytearray((self.counts[length] + 7)//8)
+                bits[byte_index] |= bit
+
+        # From word length to a list, by offset in the word, of lists, by letter (0
+        # for A), of bitsets of the words with that letter at that offset.
+        self.postings = {}
+        for length, offsets in postings.iteritems():
+            self.postings[length] = [[self._from_bytes(bits) for bits in letters]
+                    for letters in offsets]
+
+        # From word length to a list, by number of distinct letters up to MAX_BLANKS,
+        # of bitsets of the words with exactly that many distinct letters.
+        self.distinct_bits = {}
+        for length, counts in distinct_bits.iteritems():
+            self.distinct_bits[length] = [self._from_bytes(bits) for bits in counts]
+
+    @staticmethod
+    def _from_bytes(bits):
+        """Returns the bitset in the bytearray or string (least significant byte
+        first) as an integer."""
+
+        if not bits:
+            return 0
+
+        return int(binascii.hexlify(str(bits[::-1])), 16)
+
+    @staticmethod
+    def _to_bytes(bits, size):
+        """Inverse of _from_bytes(), returning a string of "size" bytes."""
+
+        if not size:
+            return ""
+
+        return binascii.unhexlify("%0*x" % (size*2, bits))[::-1]
+
+    def get_length_data(self, length):
+        """Returns the bitsets of the words of the given length as a string: the
+        postings by offset and letter, then the distinct_bits, each of the same
+        number of bytes. Used to store the index in a file."""
+
+        size = (self.counts[length] + 7)//8
+        bitsets = [bits for letters in self.postings[length] for bits in letters]
+        bitsets.extend(self.distinct_bits[length])
+
+        return "".join(self._to_bytes(bits, size) for bits in bitsets)
+
+    def _get_bitsets(self, length, first, count):
+        """Returns "count" bitsets, starting with bitset "first", of the data
+        returned by get_length_data() for the length."""
+
+        size = (self.counts[length] + 7)//8
+        data = self._get_length_data(length)
+        return [self._from_bytes(data[i*size:(i + 1)*size])
+                for i in range(first, first + count)]
+
+    def _load_postings(self, length):
+        letter_count = len(LETTER_BITS)
+        bitsets = self._get_bitsets(length, 0, length*letter_count)
+        return [bitsets[offset*letter_count:(offset + 1)*letter_count]
+                for offset in range(length)]
+
+    def _load_distinct_bits(self, length):
+        return self._get_bitsets(length, length*len(LETTER_BITS), MAX_BLANKS + 1)
+
+    def _get_letter_bits(self, length):
+        return [reduce(lambda a, b: a | b, letters)
+                for letters in zip(*self.postings[length])]
+
+    def get_bits_by_length(self, word_ids):
+        """Returns a dict from word length to the bitset of the given word ids of
+        that length."""
+
+        bits = bytearray((len(self.words) + 7)//8)
+        for word_id in word_ids:
+            bits[word_id >> 3] |= 1 << (word_id & 7)
+        bits = self._from_bytes(bits)
+
+        return dict((length, (bits >> start) & ((1 << self.counts[length]) - 1))
+                for length, start in self.starts.iteritems())
+
+    def get_formable_bits(self, letters, blank_count):
+        """Returns a dict from word length to the bitset of the words that can be
+        made from the letters in the "letters" mask (of LETTER_BITS) plus
+        "blank_count" blanks. Only which letters a word has is considered, not how
+        many of each, so these are the words with at most "blank_count" distinct
+        letters that aren't in the mask."""
+
+        if blank_count > MAX_BLANKS:
+            raise ValueError("too many blanks: %d" % blank_count)
+
+        # The letters (0 for A) that would have to come from blanks.
+        missing_letters = [letter for letter in range(len(LETTER_BITS))
+                if not letters & (1 << letter)]
+
+        formable_bits = {}
+        for length in self.counts:
+            letter_bits = self.letter_bits[length]
+
+            # Bitsets of the words with at least 1, 2, ... of the missing letters.
+            at_least = [0]*(blank_count + 2)
+            for letter in missing_letters:
+                bits = letter_bits[letter]
+                for count in range(blank_count + 1, 1, -1):
+                    at_least[count] |= at_least[count - 1] & bits
+                at_least[1] |= bits
+
+            all_bits = (1 << self.counts[length]) - 1
+            formable_bits[length] = all_bits & ~at_least[blank_count + 1]
+
+        return formable_bits
+
+    def iter_ids(self, length, bits):
+        """Returns a sequence of the ids of the words in the bitset of words of the
+        given length, in increasing order."""
+
+        start = self.starts[length]
+
+        # Least significant bit first.
+        digits = bin(bits)[:1:-1]
+        rank = digits.find("1")
+        while rank >= 0:
+            yield start + rank
+            rank = digits.find("1", rank + 1)
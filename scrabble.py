@@ -31,6 +31,7 @@ def main():
         rack = generate_rack(rack, bag)
         if not rack:
             break
+        print "Rack: %s" % rack
 
         # Get a list of possible solutions. These aren't all necessarily legal.
         solutions = board.generate_solutions(rack, dictionary)
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+
+# Copyright 2011 Lawrence Kesteloot
+
+"""Plays many seeded games against itself, without a display, to evaluate changes
+to the engine. Each game is written to stdout as a line of JSON as soon as it's
+done, and the throughput is written to stderr at the end. Run with:
+
+    % python selfplay.py --games 1000 --seed 1 --workers 8 > games.jsonl
+
+The same seed always plays the same game."""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from bag import generate_rack, get_full_bag
+from board import Board, GENERATOR_SUBSETS, GENERATOR_DAWG, GENERATOR_NUMPY
+from dictionary import Dictionary
+
+DICTIONARY_FILENAME = "dictionary"
+
+# The dictionary of this worker process. Set by _init_worker().
+_dictionary = None
+
+def play_game(dictionary, seed, generator=GENERATOR_SUBSETS):
+    """Play a game from a full bag until we're out of tiles or solutions. Returns
+    a dict describing the game, suitable for JSON."""
+
+    rng = random.Random(seed)
+    board = Board()
+    bag = get_full_bag()
+    rack = ""
+    moves = []
+    game_before = time.time()
+
+    while True:
+        rack = generate_rack(rack, bag, rng)
+        if not rack:
+            break
+
+        before = time.time()
+        solution = board.find_best_move(rack, dictionary, generator)
+        elapsed = time.time() - before
+
+        if not solution:
+            break
+
+        board.add_solution(solution)
+        moves.append({
+            "rack": rack,
+            "move": str(solution),
+            "word": solution.word,
+            "row": solution.row,
+            "col": solution.col,
+            "direction": str(solution.direction),
+            "blanks": solution.word_blank_indices,
+            "score": solution.score,
+            "seconds": round(elapsed, 6),
+        })
+        rack = solution.get_new_rack(rack)
+
+    return {
+        "seed": seed,
+        "score": sum(move["score"] for move in moves),
+        "turns": len(moves),
+        "seconds": round(time.time() - game_before, 6),
+        "moves": moves,
+    }
+
+def _init_worker(dictionary):
+    """Runs once in each worker process when the pool starts."""
+
+    global _dictionary
+    _dictionary = dictionary
+
+def _play_game(job):
+    """Play one game in a worker process."""
+
+    seed, generator = job
+    return play_game(_dictionary, seed, generator)
+
+def run_batch(dictionary, games, seed, workers, generator, output):
+    """Play "games" games with seeds starting at "seed", writing each to "output"
+    as a line of JSON. Returns a tuple of the number of games, the total number of
+    turns, and the elapsed time."""
+
+    jobs = [(seed + i, generator) for i in range(games)]
+    before = time.time()
+    turns = 0
+
+    # Build the word graph or positional index before forking so the workers
+    # share it.
+    if generator == GENERATOR_DAWG:
+        dictionary.get_dawg()
+    elif generator == GENERATOR_NUMPY:
+        dictionary.get_word_matrices()
+    else:
+        dictionary.get_positional_index()
+
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, _init_worker, (dictionary,))
+        results = pool.imap(_play_game, jobs, chunksize=1)
+    else:
+        pool = None
+        results = itertools.imap(lambda job: play_game(dictionary, *job), jobs)
+
+    try:
+        for result in results:
+            turns += result["turns"]
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return games, turns, time.time() - before
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded games in batch.")
+    parser.add_argument("--games", type=int, default=10, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+            help="number of worker processes")
+    parser.add_argument("--generator",
+            choices=[GENERATOR_SUBSETS, GENERATOR_DAWG, GENERATOR_NUMPY],
+            default=GENERATOR_SUBSETS, help="move generator")
+    parser.add_argument("--dictionary", default=DICTIONARY_FILENAME,
+            help="dictionary file")
+    args = parser.parse_args()
+
+    dictionary = Dictionary.load(args.dictionary)
+    games, turns, elapsed = run_batch(dictionary, args.games, args.seed,
+            args.workers, args.generator, sys.stdout)
+
+    sys.stderr.write("%d games, %d turns in %.1fs: %.2f games/sec, %.2f turns/sec\n" % (
+        games, turns, elapsed, games/elapsed, turns/elapsed))
+
+if __name__ == "__main__":
+    main()
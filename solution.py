@@ -2,6 +2,10 @@
 
 """Class for representing possible solutions."""
 
+import string
+
+from board_exceptions import OutsideError, MismatchLetterError
+
 # How much each letter is worth. Blank tiles are not on this list but are worth zero points.
 # http://en.wikipedia.org/wiki/Scrabble_letter_distributions#English
 LETTER_SCORE = {
@@ -35,9 +39,150 @@ LETTER_SCORE = {
 
 SCRABBLE_BONUS = 50
 
+# Bit for each letter in a set of letters stored as an integer.
+LETTER_BITS = dict((ch, 1 << i) for i, ch in enumerate(string.ascii_uppercase))
+
+# Set of all letters.
+ALL_LETTERS = (1 << len(LETTER_BITS)) - 1
+
+# Move generation and scoring go through many more solutions than are returned, so
+# they use a compact form of solution called a candidate: a tuple of (row, col,
+# direction, word, blank mask, rack mask). Bit "i" of the blank mask is set if a
+# blank was used for letter "i" of the word, and bit "i" of the rack mask is set if
+# tile "i" of the rack was used. See Solution for the fields.
+
+def get_mask(indices):
+    """Returns the list of small non-negative integers as a bitmask."""
+
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+
+    return mask
+
+def get_indices(mask):
+    """Inverse of get_mask(): returns the list of the set bits in increasing order."""
+
+    indices = []
+    i = 0
+    while mask:
+        if mask & 1:
+            indices.append(i)
+        mask >>= 1
+        i += 1
+
+    return indices
+
+def get_candidate_score(board, dictionary, candidate):
+    """Returns the score of the candidate, or None if it's not legal. See
+    Solution.determine_score()."""
+
+    board.update_cross_checks(dictionary)
+
+    row, col, direction, word, blank_mask, rack_mask = candidate
+    size = board.SIZE
+    cells = board.cells
+    blanks = board.blanks
+    letter_multipliers = board.LETTER_MULTIPLIERS
+    word_multipliers = board.WORD_MULTIPLIERS
+    cross_checks = board.cross_checks[direction.index]
+    cross_scores = board.cross_scores[direction.index]
+
+    if row + direction.drow*(len(word) - 1) >= size \
+            or col + direction.dcol*(len(word) - 1) >= size:
+
+        raise OutsideError()
+
+    # Distance between consecutive squares of the word in the cell arrays.
+    step = direction.drow*size + direction.dcol
+    first_index = board.get_index(row, col)
+    last_index = first_index + step*(len(word) - 1)
+
+    # Score of the main word before the word multiplier, the word multiplier, and
+    # the total score of the perpendicular words.
+    word_score = 0
+    word_multiplier = 1
+    cross_score = 0
+
+    index = first_index
+    for word_index, ch in enumerate(word):
+        cell = cells[index]
+        if not cell:
+            # We're adding this tile. See if it makes a legal perpendicular word.
+            if not cross_checks[index] & LETTER_BITS[ch]:
+                return None
+
+            letter_multiplier = letter_multipliers[index]
+            letter_score = 0 if blank_mask >> word_index & 1 else LETTER_SCORE[ch]
+            word_score += letter_score*letter_multiplier
+            word_multiplier *= word_multipliers[index]
+
+            # Score up the perpendicular word we touched, if any.
+            perpendicular_score = cross_scores[index]
+            if perpendicular_score is not None:
+                cross_score += (perpendicular_score + letter_score*letter_multiplier) \
+                        * word_multipliers[index]
+        else:
+            if cell != ord(ch):
+                raise MismatchLetterError()
+
+            # Existing tile, no multipliers.
+            if not (blanks >> index & 1 or blank_mask >> word_index & 1):
+                word_score += LETTER_SCORE[ch]
+
+        index += step
+
+    # See if we extended a word at either end.
+    prefix = ""
+    index = first_index
+    while Solution.is_in_line(index, step, -1, size) and cells[index - step]:
+        index -= step
+        prefix = chr(cells[index]) + prefix
+        if not blanks >> index & 1:
+            word_score += LETTER_SCORE[chr(cells[index])]
+
+    suffix = ""
+    index = last_index
+    while Solution.is_in_line(index, step, 1, size) and cells[index + step]:
+        index += step
+        suffix += chr(cells[index])
+        if not blanks >> index & 1:
+            word_score += LETTER_SCORE[chr(cells[index])]
+
+    if prefix or suffix:
+        word = prefix + word + suffix
+    if not dictionary.has_word(word):
+        return None
+
+    score = word_score*word_multiplier + cross_score
+    if bin(rack_mask).count("1") == 7:
+        score += SCRABBLE_BONUS
+
+    return score
+
+def get_candidate_placement(board, candidate):
+    """Returns a tuple of the tiles the candidate adds to the board, as (index,
+    letter, is_blank) tuples. Candidates with the same placement are the same move,
+    even if their words start at different squares."""
+
+    row, col, direction, word, blank_mask, rack_mask = candidate
+    cells = board.cells
+    step = direction.drow*board.SIZE + direction.dcol
+    index = board.get_index(row, col)
+    placement = []
+    for word_index, ch in enumerate(word):
+        if not cells[index]:
+            placement.append((index, ch, bool(blank_mask >> word_index & 1)))
+        index += step
+
+    return tuple(placement)
+
 class Solution(object):
     """Represents a possible solution (and optionally its score)."""
 
+    __slots__ = ["row", "col", "direction", "word", "score", "word_blank_indices",
+            "rack_indices"]
+
     def __init__(self, row, col, direction, word, word_blank_indices=None, rack_indices=None):
         """A word at a position and direction. word_blank_indices is a list of indices
         in word where blank tiles were used. rack_indices is a list of indices that were
@@ -67,7 +212,28 @@ class Solution(object):
         return s
 
     def determine_score(self, board, dictionary):
-        """Sets the score field to the score of the word, or to None if the word is not legal."""
+        """Sets the score field to the score of the word, or to None if the word is not legal.
+        The board is not modified: our tiles are overlaid on it, and the perpendicular
+        words are checked and scored with the board's cross-checks. Gives the same
+        score as determine_score_with_clone()."""
+
+        self.score = get_candidate_score(board, dictionary, self.get_candidate())
+
+    @staticmethod
+    def is_in_line(index, step, delta, size):
+        """Whether moving "delta" squares (1 or -1) from index along step (1 for
+        horizontal, the board size for vertical) stays in the same line on the board."""
+
+        if step == 1:
+            col = index % size + delta
+            return col >= 0 and col < size
+        else:
+            row = index // size + delta
+            return row >= 0 and row < size
+
+    def determine_score_with_clone(self, board, dictionary):
+        """Same as determine_score(), but plays the word onto a copy of the board
+        and looks up every word it makes. Slower, but kept as a reference."""
 
         # Make a copy so we can put our word into it.
         new_board = board.clone()
@@ -102,7 +268,7 @@ class Solution(object):
                     letter_multiplier = 1
 
                 # zero if the tile is blank
-                if new_board.is_blank[index]:
+                if new_board.is_blank(index):
                     letter_multiplier = 0
 
 
@@ -145,6 +311,29 @@ class Solution(object):
         if len(self.rack_indices) == 7:
             self.score += SCRABBLE_BONUS
 
+    def get_placement(self, board):
+        """Returns a tuple of the tiles this solution adds to the board, as (index,
+        letter, is_blank) tuples. Solutions with the same placement are the same move,
+        even if their words start at different squares."""
+
+        return get_candidate_placement(board, self.get_candidate())
+
+    def get_candidate(self):
+        """Returns the solution as a candidate (see get_candidate_score())."""
+
+        return (self.row, self.col, self.direction, self.word,
+                get_mask(self.word_blank_indices), get_mask(self.rack_indices))
+
+    @classmethod
+    def from_candidate(cls, candidate, score=None):
+        """Inverse of get_candidate(), with the given score."""
+
+        row, col, direction, word, blank_mask, rack_mask = candidate
+        solution = cls(row, col, direction, word, get_indices(blank_mask),
+                get_indices(rack_mask))
+        solution.score = score
+        return solution
+
     def get_new_rack(self, rack):
         """Given this solution and the rack it came from, return the rack after the
         tiles were used."""
@@ -0,0 +1,27 @@
+#!/usr/bin/python
+
+"""Test the benchmark suite's corpus and regression check."""
+
+from benchmark import GAME, POSITIONS, compare, make_board
+import unittest
+
+class Test_benchmark(unittest.TestCase):
+    def test_positions(self):
+        for name, move_count, rack in POSITIONS:
+            self.assertTrue(move_count <= len(GAME))
+            self.assertEqual(len(rack), 7)
+        board = make_board(len(GAME))
+        self.assertFalse(board.is_empty())
+
+    def test_compare(self):
+        baseline = {
+            "a": {"median": 1.0},
+            "b": {"median": 1.0},
+            "c": {"median": 1.0},
+        }
+        results = {
+            "a": {"median": 1.05},
+            "b": {"median": 1.5},
+            "d": {"median": 9.0},
+        }
+        self.assertEqual(compare(results, baseline, 0.1), [("b", 1.0, 1.5)])
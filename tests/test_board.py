@@ -0,0 +1,152 @@
+#!/usr/bin/python
+
+"""Test the compact board representation."""
+
+from bag import get_rack_counts
+from board import Board, PREMIUM_CELLS
+from dictionary import Dictionary
+from direction import DIRECTIONS, HORIZONTAL, VERTICAL
+import instrumentation
+import unittest
+
+class Test_board(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        self.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        self.board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+
+    def test_tables(self):
+        for direction in DIRECTIONS:
+            for line in range(Board.SIZE):
+                for pos in range(Board.SIZE):
+                    row, col = direction.get_absolute_position(pos, line)
+                    self.assertEqual(Board.LINE_INDICES[direction.index][line][pos],
+                            Board.get_index(row, col))
+                    self.assertEqual(direction.get_line_position(row, col), (pos, line))
+
+        self.assertEqual(Board.get_word_multiplier(0), 3)
+        self.assertEqual(Board.get_letter_multiplier(0), 1)
+        self.assertEqual(Board.get_letter_multiplier(Board.get_index(0, 3)), 2)
+        self.assertEqual(Board.get_word_multiplier(Board.MID_INDEX), 2)
+        self.assertEqual(PREMIUM_CELLS[Board.MID_INDEX], "D")
+
+    def test_letters(self):
+        index = Board.get_index(Board.MID_ROW + 2, Board.MID_COL + 2)
+        self.assertEqual(self.board.get_letter(index), "S")
+        self.assertTrue(self.board.is_blank(index))
+        self.assertEqual(self.board.get_letter(Board.MID_INDEX), "I")
+        self.assertFalse(self.board.is_blank(Board.MID_INDEX))
+        self.assertEqual(self.board.get_letter(0), None)
+        self.assertFalse(self.board.is_empty())
+        self.assertTrue(Board().is_empty())
+
+    def test_edges_and_words(self):
+        row, col, length = self.board.find_edges(Board.MID_ROW, Board.MID_COL, HORIZONTAL)
+        self.assertEqual((row, col, length), (Board.MID_ROW, Board.MID_COL - 1, 4))
+        self.assertEqual(self.board.get_word(row, col, length, HORIZONTAL), "MILO")
+
+        row, col, length = self.board.find_edges(Board.MID_ROW, Board.MID_COL + 2, VERTICAL)
+        self.assertEqual((row, col, length), (Board.MID_ROW - 1, Board.MID_COL + 2, 4))
+        self.assertEqual(self.board.get_word(row, col, length, VERTICAL), "DOGS")
+
+    def test_try_word(self):
+        # The I of LIX doesn't match the O of MILO.
+        self.assertEqual(self.board.try_word("LIX", "X", Board.MID_ROW, Board.MID_COL + 1,
+            HORIZONTAL), (-1, None, None))
+        self.assertEqual(self.board.try_word("LOX", "?", Board.MID_ROW, Board.MID_COL + 1,
+            HORIZONTAL), (1, [2], [0]))
+        self.assertEqual(self.board.try_word("MILOS", "S?", Board.MID_ROW, Board.MID_COL - 1,
+            HORIZONTAL), (1, [], [0]))
+        self.assertEqual(self.board.try_word("MILOS", "?", Board.MID_ROW, Board.MID_COL - 1,
+            HORIZONTAL), (1, [4], [0]))
+
+        # The rack counts are left as they were.
+        counts = get_rack_counts("SO?")
+        line_indices = Board.LINE_INDICES[HORIZONTAL.index][Board.MID_ROW]
+        self.assertEqual(self.board.fit_word("MILOSSS", counts, line_indices,
+            Board.MID_COL - 1), None)
+        self.assertEqual(self.board.fit_word("MILOSOS", counts, line_indices,
+            Board.MID_COL - 1), ([18, 14, 26], [6]))
+        self.assertEqual(counts, get_rack_counts("?OS"))
+
+        # Off the edge of the board.
+        self.assertEqual(self.board.try_word("MILO", "MILO", 0, Board.SIZE - 3,
+            HORIZONTAL), (-1, None, None))
+
+    def test_blank_arrangements(self):
+        # The blanks can't stand for the O of MILO.
+        line_indices = Board.LINE_INDICES[HORIZONTAL.index][Board.MID_ROW]
+        self.assertEqual(self.board.get_blank_arrangements("OLIO", [3], line_indices,
+            Board.MID_COL + 2), [])
+        self.assertEqual(self.board.get_blank_arrangements("OLLO", [1, 3], line_indices,
+            Board.MID_COL + 2), [[2, 3]])
+
+        line_indices = Board.LINE_INDICES[HORIZONTAL.index][0]
+        self.assertEqual(sorted(self.board.get_blank_arrangements("ALAL", [0, 1],
+            line_indices, 0)), [[0, 3], [1, 2], [2, 3]])
+
+    def test_no_duplicate_solutions(self):
+        dictionary = Dictionary()
+        dictionary.set_words(["MILO", "MILOS", "DOG", "DOGS", "GO", "SO", "OS", "LO",
+            "OH", "HO", "LOGO", "SOLO"])
+        solutions = self.board.generate_solutions("SHOGLO?", dictionary)
+        placements = [solution.get_placement(self.board) for solution in solutions]
+        self.assertTrue(placements)
+        self.assertEqual(len(set(placements)), len(placements))
+
+    def test_line_cache(self):
+        dictionary = Dictionary()
+        dictionary.set_words(["MILO", "MILOS", "DOG", "DOGS", "GO", "SO", "OS", "LO",
+            "OH", "HO", "LOGO", "SOLO"])
+        self.assertEqual(dictionary.line_cache, None)
+        dictionary.set_line_cache_size(Dictionary.LINE_CACHE_SIZE)
+        self.board.generate_solutions("SHOGLO?", dictionary)
+        self.board.add_word("SO", Board.MID_ROW + 2, Board.MID_COL + 2, HORIZONTAL)
+
+        # Only the lines that changed are generated again.
+        with instrumentation.collect() as stats:
+            solutions = self.board.generate_solutions("?SHOGLO", dictionary)
+        self.assertTrue(stats.counters["line_cache_hits"] > 0)
+        self.assertTrue(stats.counters["line_cache_misses"] > 0)
+
+        dictionary.set_line_cache_size(0)
+        expected = self.board.generate_solutions("?SHOGLO", dictionary)
+        self.assertEqual([(str(s), s.rack_indices) for s in solutions],
+                [(str(s), s.rack_indices) for s in expected])
+
+    def test_occupancy(self):
+        middle = Board.MID_COL
+        self.assertEqual(self.board.occupancy[HORIZONTAL.index][Board.MID_ROW],
+                0b1111 << (middle - 1))
+        self.assertEqual(self.board.occupancy[VERTICAL.index][Board.MID_COL + 2],
+                0b1111 << (Board.MID_ROW - 1))
+
+        # Along the row of MILO, the squares at either end and the one under the D.
+        self.assertEqual(self.board.get_anchors(Board.MID_ROW, HORIZONTAL),
+                (1 << (middle - 2)) | (1 << (middle + 3)))
+        self.assertEqual(self.board.get_anchors(Board.MID_ROW - 1, HORIZONTAL),
+                (0b111 << (middle - 1)) | (1 << (middle + 3)))
+        self.assertEqual(self.board.get_touching(Board.MID_ROW - 1, HORIZONTAL),
+                0b1111 << (middle - 1))
+        self.assertEqual(self.board.get_anchors(0, HORIZONTAL), 0)
+
+        self.assertTrue(self.board.has_neighboring_cell(Board.MID_ROW + 1, 0, HORIZONTAL,
+            middle))
+        self.assertFalse(self.board.has_neighboring_cell(Board.MID_ROW + 1, 0, HORIZONTAL,
+            middle - 1))
+
+        # An empty board only has the middle square.
+        board = Board()
+        self.assertEqual(board.get_anchors(Board.MID_COL, VERTICAL), 1 << Board.MID_ROW)
+        self.assertEqual(board.get_touching(Board.MID_ROW, HORIZONTAL), 1 << Board.MID_COL)
+        self.assertEqual(board.get_anchors(0, HORIZONTAL), 0)
+
+    def test_clone(self):
+        clone = self.board.clone()
+        clone.add_word("AT", 0, 0, HORIZONTAL, [0])
+        self.assertEqual(clone.get_letter(0), "A")
+        self.assertTrue(clone.is_blank(0))
+        self.assertEqual(self.board.get_letter(0), None)
+        self.assertFalse(self.board.is_blank(0))
+        self.assertEqual(clone.occupancy[HORIZONTAL.index][0], 0b11)
+        self.assertEqual(self.board.occupancy[HORIZONTAL.index][0], 0)
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+
+"""Test the branch-and-bound search for the best solution."""
+
+from board import Board, GENERATOR_DAWG
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+import unittest
+
+class Test_bounded(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO", "SH", "OD"])
+        cls.board = Board()
+        cls.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        cls.board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+
+    def test_upper_bound(self):
+        self.board.update_cross_checks(self.dic)
+        line_scores = self.board.get_line_scores()
+        for generator in ["subsets", GENERATOR_DAWG]:
+            for rack in ["SHOGLEX", "YEWLLOH", "JE?LOS?"]:
+                for solution in self.board.generate_solutions(rack, self.dic, generator):
+                    bound = self.board.get_score_upper_bound(solution, line_scores)
+                    solution.determine_score(self.board, self.dic)
+                    if bound is None:
+                        self.assertIs(solution.score, None)
+                    else:
+                        self.assertTrue(bound >= solution.score, str(solution))
+
+    def test_same_best_solution(self):
+        for rack in ["SHOGLEX", "YEWLLOH", "JE?LOS?", "XXXXXXX"]:
+            solutions = self.board.generate_solutions(rack, self.dic)
+            expected = self.board.find_best_solution(solutions, self.dic)
+            actual = self.board.find_best_solution_bounded(solutions, self.dic)
+            self.assertIs(actual, expected)
+
+    def test_find_best_move(self):
+        for generator in ["subsets", GENERATOR_DAWG]:
+            for rack in ["SHOGLEX", "YEWLLOH", "JE?LOS?", "XXXXXXX"]:
+                solutions = self.board.generate_solutions(rack, self.dic, generator)
+                self.assertEqual([str(s) for s in solutions], [str(s) for s in
+                    self.board.iter_solutions(rack, self.dic, generator)])
+
+                expected = self.board.find_best_solution(solutions, self.dic)
+                actual = self.board.find_best_move(rack, self.dic, generator)
+                self.assertEqual(str(actual), str(expected))
+
+    def test_top_solutions(self):
+        for generator in ["subsets", GENERATOR_DAWG]:
+            for rack in ["SHOGLEX", "YEWLLOH", "JE?LOS?"]:
+                solutions = self.board.generate_solutions(rack, self.dic, generator)
+                for solution in solutions:
+                    solution.determine_score(self.board, self.dic)
+
+                # Legal solutions with distinct placements, best first.
+                placements = set()
+                expected = []
+                for solution in solutions:
+                    placement = solution.get_placement(self.board)
+                    if solution.score > 0 and placement not in placements:
+                        placements.add(placement)
+                        expected.append((placement, solution.score))
+                expected.sort(key=lambda (placement, score): -score)
+
+                for k in [1, 3, 1000]:
+                    top = self.board.find_top_solutions(rack, self.dic, k, generator)
+                    self.assertEqual([(solution.get_placement(self.board), solution.score)
+                        for solution in top], expected[:k])
+
+    def test_top_solution_is_best(self):
+        for rack in ["SHOGLEX", "YEWLLOH", "JE?LOS?"]:
+            solutions = self.board.generate_solutions(rack, self.dic)
+            best = self.board.find_best_solution(solutions, self.dic)
+            top = self.board.find_top_solutions(rack, self.dic, 5)
+            self.assertEqual(str(top[0]), str(best))
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+
+"""Test the cross-checks that the board keeps for each empty square."""
+
+from board import Board, ALL_LETTERS, LETTER_BITS
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+from solution import Solution
+import unittest
+
+class Test_cross_checks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["MILO", "MILOS", "DOG", "DOGS", "GO", "SO", "OS", "LO", "AD"])
+
+    def test_letters_and_score(self):
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        board.update_cross_checks(self.dic)
+
+        # Below the O of MILO only "OS" is a word. O is worth 1.
+        index = Board.get_index(Board.MID_ROW + 1, Board.MID_COL + 2)
+        self.assertEqual(board.cross_checks[HORIZONTAL.index][index], LETTER_BITS["S"])
+        self.assertEqual(board.cross_scores[HORIZONTAL.index][index], 1)
+
+        # After MILO only "MILOS" is a word. M+I+L+O is worth 6.
+        index = Board.get_index(Board.MID_ROW, Board.MID_COL + 3)
+        self.assertEqual(board.cross_checks[VERTICAL.index][index], LETTER_BITS["S"])
+        self.assertEqual(board.cross_scores[VERTICAL.index][index], 6)
+
+        # Nothing next to this square.
+        index = Board.get_index(0, 0)
+        self.assertEqual(board.cross_checks[HORIZONTAL.index][index], ALL_LETTERS)
+        self.assertEqual(board.cross_scores[HORIZONTAL.index][index], None)
+
+    def test_incremental_update(self):
+        board = Board()
+        board.update_cross_checks(self.dic)
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        board.update_cross_checks(self.dic)
+        board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+        board.update_cross_checks(self.dic)
+        board.add_word("AD", Board.MID_ROW - 1, Board.MID_COL + 1, HORIZONTAL)
+        board.update_cross_checks(self.dic)
+
+        # Compare to computing them all from scratch.
+        fresh = Board()
+        fresh.cells = board.cells[:]
+        fresh.blanks = board.blanks
+        fresh.update_cross_checks(self.dic)
+        self.assertEqual(board.cross_checks, fresh.cross_checks)
+        self.assertEqual(board.cross_scores, fresh.cross_scores)
+
+    def test_reject_illegal_solution(self):
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        solution = Solution(Board.MID_ROW + 1, Board.MID_COL + 1, HORIZONTAL, "GO")
+        solution.determine_score(board, self.dic)
+        self.assertIs(solution.score, None)
+
+        solutions = board.generate_solutions("GOSDXXX", self.dic)
+        self.assertTrue(solutions)
+        for solution in solutions:
+            self.assertTrue(board.fits_cross_checks(solution.word, solution.row,
+                solution.col, solution.direction))
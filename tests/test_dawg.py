@@ -0,0 +1,63 @@
+#!/usr/bin/python
+
+"""Test the word graph and the anchor-based move generator."""
+
+from board import Board, GENERATOR_DAWG
+from dawg import Dawg
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+import unittest
+
+class Test_dawg(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO"])
+
+    def test_has_word(self):
+        dawg = Dawg(["CAT", "CATS", "DOG", "DOGS"])
+        self.assertTrue(dawg.has_word("CAT"))
+        self.assertTrue(dawg.has_word("DOGS"))
+        self.assertFalse(dawg.has_word("CA"))
+        self.assertFalse(dawg.has_word("DOGSS"))
+
+    def test_shared_suffixes(self):
+        # The "S" endings share nodes.
+        dawg = Dawg(["CAT", "CATS", "DOG", "DOGS"])
+        self.assertEqual(dawg.count_nodes(), 7)
+
+    def test_empty_board(self):
+        board = Board()
+        solutions = board.generate_solutions("HELLOXX", self.dic, GENERATOR_DAWG)
+        solution = board.find_best_solution(solutions, self.dic)
+        self.assertEqual(solution.word, "HELLO")
+        self.assertEqual(solution.score, 24)
+
+    def test_blank(self):
+        board = Board()
+        solutions = board.generate_solutions("HEL??XX", self.dic, GENERATOR_DAWG)
+        solution = board.find_best_solution(solutions, self.dic)
+        self.assertEqual(solution.word, "HELLO")
+        self.assertEqual(solution.score, 20)
+
+    def test_only_legal_solutions(self):
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+        solutions = board.generate_solutions("SHOGLE?", self.dic, GENERATOR_DAWG)
+        self.assertTrue(solutions)
+        for solution in solutions:
+            solution.determine_score(board, self.dic)
+            self.assertIsNot(solution.score, None, str(solution))
+
+    def test_same_best_score(self):
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+        for rack in ["SHOGLEX", "YEWLLOH", "JE?LOSS"]:
+            solutions = board.generate_solutions(rack, self.dic)
+            expected = board.find_best_solution(solutions, self.dic)
+            solutions = board.generate_solutions(rack, self.dic, GENERATOR_DAWG)
+            actual = board.find_best_solution(solutions, self.dic)
+            self.assertEqual(actual.score, expected.score)
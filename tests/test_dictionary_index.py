@@ -0,0 +1,79 @@
+#!/usr/bin/python
+
+"""Test the compiled dictionary index."""
+
+from dictionary import Dictionary
+from dictionary_index import CompiledLettersMap
+import os
+import shutil
+import tempfile
+import unittest
+
+class Test_dictionary_index(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "words")
+        self.index_filename = self.filename + ".index"
+        self.write_words("hello jello yellow hell dog dogs")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_words(self, contents):
+        f = open(self.filename, "w")
+        f.write(contents)
+        f.close()
+
+    def test_round_trip(self):
+        built = Dictionary.load(self.filename)
+        self.assertTrue(os.path.exists(self.index_filename))
+        loaded = Dictionary.load(self.filename)
+        self.assertIsInstance(loaded.letters_map, CompiledLettersMap)
+
+        self.assertEqual(loaded.words, built.words)
+        self.assertEqual(loaded.word_ids, built.word_ids)
+        for name in ["letters_map"]:
+            built_map = getattr(built, name)
+            loaded_map = getattr(loaded, name)
+            self.assertEqual(len(loaded_map), len(built_map))
+            for key, words in built_map.iteritems():
+                self.assertEqual(loaded_map[key], words)
+        self.assertEqual(loaded.letters_map[Dictionary.get_letters_mask("XYZ")], [])
+
+    def test_positional_index(self):
+        built = Dictionary.load(self.filename)
+        loaded = Dictionary.load(self.filename)
+        self.assertIsNone(loaded.positional_index)
+
+        built_index = built.get_positional_index()
+        loaded_index = loaded.get_positional_index()
+        self.assertEqual(loaded_index.counts, built_index.counts)
+        for length in built_index.counts:
+            self.assertEqual(loaded_index.postings[length], built_index.postings[length])
+            self.assertEqual(loaded_index.distinct_bits[length],
+                    built_index.distinct_bits[length])
+        self.assertEqual(loaded.get_blank_words(Dictionary.get_letters_mask("DOG"), 1),
+                built.get_blank_words(Dictionary.get_letters_mask("DOG"), 1))
+
+    def test_stale_index(self):
+        Dictionary.load(self.filename)
+        self.write_words("cat cats")
+        dictionary = Dictionary.load(self.filename)
+        self.assertEqual(dictionary.words, ["CAT", "CATS"])
+
+        # The index was rebuilt for the new word list.
+        dictionary = Dictionary.load(self.filename)
+        self.assertIsInstance(dictionary.letters_map, CompiledLettersMap)
+        self.assertEqual(dictionary.letters_map[Dictionary.get_letters_mask("CAT")], ["CAT"])
+
+    def test_corrupt_index(self):
+        f = open(self.index_filename, "w")
+        f.write("garbage")
+        f.close()
+        dictionary = Dictionary.load(self.filename)
+        self.assertTrue(dictionary.has_word("JELLO"))
+
+    def test_no_index(self):
+        dictionary = Dictionary.load(self.filename, index_filename=False)
+        self.assertTrue(dictionary.has_word("JELLO"))
+        self.assertFalse(os.path.exists(self.index_filename))
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+
+"""Test the engine's counters and timers."""
+
+from benchmark import GAME, make_board
+from board import Board, GENERATOR_DAWG, GENERATOR_NUMPY
+from dictionary import Dictionary
+from direction import HORIZONTAL
+import instrumentation
+import numpy_fit
+import unittest
+
+class Test_instrumentation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "MILO", "MILOS", "GO", "SO", "OS", "LO"])
+
+    def test_collect(self):
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        with instrumentation.collect() as stats:
+            solutions = board.generate_solutions("HELLGOS", self.dic)
+            board.find_best_solution(solutions, self.dic)
+        self.assertFalse(instrumentation.enabled)
+
+        self.assertEqual(stats.counters["candidates"] - stats.counters["duplicate_candidates"],
+                len(solutions))
+        self.assertTrue(stats.counters["duplicate_candidates"] > 0)
+        self.assertEqual(stats.counters["scored"], len(solutions))
+        self.assertTrue(stats.counters["combinations"] > 0)
+        self.assertTrue(stats.counters["words_looked_up"] > 0)
+        self.assertTrue(stats.counters["placements_tried"] >= stats.counters["candidates"])
+        self.assertTrue(stats.counters["cross_check_rejections"] > 0)
+        self.assertIn("generate", stats.timers)
+        self.assertIn("score", stats.timers)
+
+        # Nothing is collected after the block.
+        board.generate_solutions("HELLGOS", self.dic)
+        self.assertEqual(stats.counters["scored"], len(solutions))
+
+    @unittest.skipUnless(numpy_fit.is_available(), "NumPy is not installed")
+    def test_batched_score_time(self):
+        # Candidates are scored in batches as they're generated. Only the scoring
+        # counts as "score", so on a crowded board it's much less than "generate".
+        dictionary = Dictionary()
+        dictionary.set_words([move[0] for move in GAME] + ["AT", "IS", "IT", "RE",
+            "ES", "SAT", "TEA", "EAR", "ERA", "ART", "STAR", "RATE", "TEAR", "RISE",
+            "TIRE", "STIR", "STAIR", "STARE", "IRATE", "TRIES", "SATIRE", "ARTIST",
+            "TASTIER", "RETAINS", "STAINER", "RETINAS"])
+        board = make_board(len(GAME))
+        with instrumentation.collect() as stats:
+            board.find_best_move("AEIRST?", dictionary, GENERATOR_NUMPY)
+
+        self.assertTrue(stats.counters["scored"] > 0)
+        self.assertTrue(stats.timers["score"] < stats.timers["generate"])
+
+    def test_hook(self):
+        events = []
+        hook = lambda kind, name, value: events.append((kind, name))
+        instrumentation.add_listener(hook)
+        try:
+            Board().generate_solutions("HELLOXX", self.dic, GENERATOR_DAWG)
+        finally:
+            instrumentation.remove_listener(hook)
+
+        self.assertIn((instrumentation.COUNT, "candidates"), events)
+        self.assertIn((instrumentation.TIME, "generate"), events)
@@ -0,0 +1,28 @@
+#!/usr/bin/python
+
+"""Test the map from sets of letters to word ids."""
+
+from letters_map import LettersMap, get_letters_mask
+import unittest
+
+class Test_letters_map(unittest.TestCase):
+    def setUp(self):
+        self.words = ["DOG", "GOD", "HELL", "DOGS", "HELLO", "JELLO"]
+        self.letters_map = LettersMap.build(self.words)
+
+    def test_lookup(self):
+        self.assertEqual(list(self.letters_map.get_ids(get_letters_mask("DGO"))), [0, 1])
+        self.assertEqual(self.letters_map[get_letters_mask("OLLEH")], ["HELLO"])
+        self.assertEqual(self.letters_map[get_letters_mask("XYZ")], [])
+        self.assertEqual(self.letters_map.get_ids(get_letters_mask("XYZ")), None)
+        self.assertEqual(self.letters_map.get(get_letters_mask("XYZ"), "none"), "none")
+        self.assertTrue(get_letters_mask("EHL") in self.letters_map)
+        self.assertEqual(len(self.letters_map), 5)
+
+    def test_arrays(self):
+        keys, offsets, postings = self.letters_map.get_arrays()
+        self.assertEqual(list(keys), sorted(keys))
+        self.assertEqual(len(offsets), len(keys) + 1)
+        self.assertEqual(sorted(postings), range(len(self.words)))
+        self.assertEqual(dict(self.letters_map.iteritems())[get_letters_mask("DOGS")],
+                ["DOGS"])
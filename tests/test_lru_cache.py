@@ -0,0 +1,32 @@
+#!/usr/bin/python
+
+"""Test the LRU cache."""
+
+from lru_cache import LruCache
+import unittest
+
+class Test_lru_cache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+
+        # "b" is now the least recently used.
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertFalse("b" in cache)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (3, 1, 1))
+
+    def test_replace(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("a", 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a", 0), 2)
+
+        cache.clear()
+        self.assertEqual(cache.get("a", 0), 0)
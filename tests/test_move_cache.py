@@ -0,0 +1,72 @@
+#!/usr/bin/python
+
+"""Test the Zobrist hash and the move cache."""
+
+from board import Board
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+from move_cache import MoveCache
+import unittest
+
+class Test_move_cache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO"])
+
+    def setUp(self):
+        self.board = Board()
+        self.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        self.board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+
+    def test_hash(self):
+        self.assertEqual(Board().hash, 0)
+        self.assertEqual(self.board.hash, self.board.compute_hash())
+
+        # The same tiles played in a different order.
+        board = Board()
+        board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        self.assertEqual(board.hash, self.board.hash)
+
+        # Blanks change the hash.
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL, [0])
+        board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+        self.assertNotEqual(board.hash, self.board.hash)
+        self.assertEqual(board.hash, board.compute_hash())
+
+        clone = self.board.clone()
+        clone.add_word("SO", Board.MID_ROW + 2, Board.MID_COL + 2, HORIZONTAL)
+        self.assertNotEqual(clone.hash, self.board.hash)
+        self.assertEqual(clone.hash, clone.compute_hash())
+
+    def test_generate_solutions(self):
+        cache = MoveCache(self.dic)
+        expected = self.board.generate_solutions("SHOGLE?", self.dic)
+        for rack in ["SHOGLE?", "?EGHLOS", "SHOGLE?"]:
+            actual = cache.generate_solutions(self.board, rack)
+            self.assertEqual([str(s) for s in actual], [str(s) for s in expected])
+            self.assertEqual([sorted(s.get_new_rack(rack)) for s in actual],
+                    [sorted(s.get_new_rack("SHOGLE?")) for s in expected])
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["positions"], stats["hits"], stats["misses"]), (1, 2, 1))
+        self.assertEqual(stats["solutions"], len(expected))
+        self.assertTrue(stats["bytes"] > 0)
+        self.assertAlmostEqual(stats["hit_rate"], 2/3.0)
+
+    def test_find_best_move(self):
+        cache = MoveCache(self.dic, 1)
+        for rack in ["YEWLLOH", "SHOGLEX"]:
+            solutions = self.board.generate_solutions(rack, self.dic)
+            expected = self.board.find_best_solution(solutions, self.dic)
+            actual = cache.find_best_move(self.board, rack)
+            self.assertEqual(str(actual), str(expected))
+            self.assertEqual(actual.rack_indices, expected.rack_indices)
+            self.assertEqual(str(cache.find_best_move(self.board, rack)), str(actual))
+
+        self.assertIsNone(cache.find_best_move(self.board, "QQ"))
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 2))
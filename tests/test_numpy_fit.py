@@ -0,0 +1,63 @@
+#!/usr/bin/python
+
+"""Test the NumPy fit check and move generator."""
+
+from bag import get_rack_counts
+from board import Board, GENERATOR_NUMPY
+from dictionary import Dictionary
+from direction import DIRECTIONS, HORIZONTAL, VERTICAL
+import numpy_fit
+import unittest
+
+@unittest.skipUnless(numpy_fit.is_available(), "NumPy is not installed")
+class Test_numpy_fit(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO", "SOLO", "LOGO"])
+
+    def setUp(self):
+        self.board = Board()
+        self.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        self.board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+
+    def test_get_ranks(self):
+        self.assertEqual(list(numpy_fit.get_ranks(0b100101, 6)), [0, 2, 5])
+        self.assertEqual(list(numpy_fit.get_ranks(1 << 20, 21)), [20])
+        self.assertEqual(list(numpy_fit.get_ranks(0, 21)), [])
+
+    def test_find_fits(self):
+        positional_index = self.dic.get_positional_index()
+        matrix = self.dic.get_word_matrices().get_matrix(4)
+        words = self.dic.words[positional_index.starts[4]:]
+        line_indices = Board.LINE_INDICES[HORIZONTAL.index][Board.MID_ROW]
+        line = bytearray(self.board.cells[index] for index in line_indices)
+        ranks = numpy_fit.get_ranks((1 << len(matrix)) - 1, len(matrix))
+        positions = range(Board.MID_COL - 4, Board.MID_COL + 3)
+
+        # Of the positions that cover a tile of MILO, only LOGO fits, on its L and
+        # O. MILO itself covers no empty square.
+        fits = numpy_fit.find_fits(matrix, ranks, line, positions,
+                get_rack_counts("SHOGLO"))
+        self.assertEqual([(pos, words[rank]) for pos, rank in zip(*fits)],
+                [(Board.MID_COL + 1, "LOGO")])
+
+        # Not enough tiles.
+        self.assertEqual(numpy_fit.find_fits(matrix, ranks, line, positions,
+            get_rack_counts("G")), ((), ()))
+
+    def test_same_as_subsets(self):
+        for rack in ["SHOGLOE", "SHOGLO?", "?HOGL?Y"]:
+            for direction in DIRECTIONS:
+                for line in range(Board.SIZE):
+                    expected = []
+                    self.board.generate_solutions_in_line(rack, self.dic, line,
+                            direction, expected)
+                    actual = []
+                    self.board.generate_solutions_in_line_numpy(rack, self.dic, line,
+                            direction, actual)
+                    self.assertEqual(actual, expected)
+
+        self.assertTrue(self.board.generate_solutions("SHOGLO?", self.dic,
+            GENERATOR_NUMPY))
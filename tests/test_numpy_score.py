@@ -0,0 +1,69 @@
+#!/usr/bin/python
+
+"""Test the batched NumPy scorer."""
+
+from board import Board, GENERATOR_NUMPY
+from board_exceptions import MismatchLetterError, OutsideError
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+from solution import Solution, get_candidate_score
+import numpy_fit
+import numpy_score
+import unittest
+
+@unittest.skipUnless(numpy_fit.is_available(), "NumPy is not installed")
+class Test_numpy_score(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO", "SH", "OD", "SOLO",
+            "LOGO", "GOLDS", "SHOGGLE"])
+
+    def setUp(self):
+        self.board = Board()
+        self.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        self.board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+        self.board.add_word("HELLO", Board.MID_ROW + 4, Board.MID_COL - 3, HORIZONTAL)
+
+    def test_same_as_scalar(self):
+        candidates = []
+        for rack in ["SHOGLOE", "SHOGLO?", "?HOGL?Y", "SHOGGLE"]:
+            candidates.extend(self.board.iter_candidates(rack, self.dic))
+
+        # Every placement of every word, legal or not, so that words extend the
+        # tiles at their ends and make illegal perpendicular words.
+        for direction in [HORIZONTAL, VERTICAL]:
+            for word in self.dic.words:
+                for row in range(Board.SIZE - direction.drow*(len(word) - 1)):
+                    for col in range(Board.SIZE - direction.dcol*(len(word) - 1)):
+                        if self.board.try_word(word, "?"*7, row, col, direction)[0] >= 0:
+                            candidates.append((row, col, direction, word, 0b1,
+                                (1 << len(word)) - 1))
+        self.assertTrue(len(candidates) > 1000)
+
+        expected = [get_candidate_score(self.board, self.dic, candidate)
+                for candidate in candidates]
+        scorer = numpy_score.BatchScorer(self.board, self.dic)
+        self.assertEqual(scorer.score(candidates), expected)
+        self.assertTrue(None in expected)
+        self.assertEqual(scorer.score([]), [])
+
+    def test_errors(self):
+        scorer = numpy_score.BatchScorer(self.board, self.dic)
+        self.assertRaises(OutsideError, scorer.score,
+                [(0, Board.SIZE - 2, HORIZONTAL, "HELL", 0, 0b1111)])
+        self.assertRaises(MismatchLetterError, scorer.score,
+                [(Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL, "HELLO", 0, 0b1)])
+
+    def test_find_best_move(self):
+        for rack in ["SHOGGLE", "SHOGLO?", "QQ"]:
+            expected = self.board.find_best_move(rack, self.dic)
+            actual = self.board.find_best_move(rack, self.dic, GENERATOR_NUMPY)
+            self.assertEqual(str(actual), str(expected))
+
+        # In batches smaller than the number of candidates.
+        best = self.board.find_best_candidate_batched(
+                self.board.iter_candidates("SHOGLO?", self.dic), self.dic, 5)
+        self.assertEqual(str(Solution.from_candidate(*best)),
+                str(self.board.find_best_move("SHOGLO?", self.dic)))
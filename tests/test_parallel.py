@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+"""Test the parallel solver."""
+
+from board import Board, GENERATOR_DAWG, GENERATOR_NUMPY
+from dictionary import Dictionary
+from direction import HORIZONTAL, VERTICAL
+from parallel import ParallelSolver
+import numpy_fit
+import unittest
+
+class Test_parallel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["HELLO", "HELL", "JELLO", "YELLOW", "MILO", "MILOS",
+            "DOG", "DOGS", "GO", "SO", "OS", "LO", "OH", "HO"])
+        cls.solver = ParallelSolver(cls.dic, 2)
+
+        cls.board = Board()
+        cls.board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        cls.board.add_word("DOG", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.solver.close()
+
+    def test_generate_solutions(self):
+        expected = self.board.generate_solutions("SHOGLE?", self.dic)
+        actual = self.solver.generate_solutions(self.board, "SHOGLE?")
+        self.assertEqual([str(s) for s in actual], [str(s) for s in expected])
+
+    def test_find_best_solution(self):
+        solutions = self.board.generate_solutions("YEWLLOH", self.dic)
+        expected = self.board.find_best_solution(solutions, self.dic)
+        actual = self.solver.find_best_solution(self.board, solutions)
+        self.assertIs(actual, expected)
+
+    def test_find_best_move(self):
+        generators = ["subsets", GENERATOR_DAWG]
+        if numpy_fit.is_available():
+            generators.append(GENERATOR_NUMPY)
+        for generator in generators:
+            for rack in ["SHOGLEX", "YEWLLOH", "JE?LOSS"]:
+                solutions = self.board.generate_solutions(rack, self.dic, generator)
+                expected = self.board.find_best_solution(solutions, self.dic)
+                actual = self.solver.find_best_move(self.board, rack, generator)
+                self.assertEqual(str(actual), str(expected))
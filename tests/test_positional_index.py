@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+"""Test the positional index of the dictionary."""
+
+from dictionary import Dictionary
+from positional_index import PositionalIndex
+import unittest
+
+class Test_positional_index(unittest.TestCase):
+    def setUp(self):
+        self.dic = Dictionary()
+        self.dic.set_words(["HELLO", "JELLO", "YELLOW", "HELL", "DOG", "DOGS", "HOLLO"])
+        self.index = self.dic.get_positional_index()
+
+    def get_words(self, length, bits):
+        return [self.dic.words[word_id] for word_id in self.index.iter_ids(length, bits)]
+
+    def test_sorted_by_length(self):
+        self.assertEqual(self.dic.words,
+                ["DOG", "HELL", "DOGS", "HELLO", "JELLO", "HOLLO", "YELLOW"])
+        self.assertEqual(self.dic.word_ids["JELLO"], 4)
+        self.assertRaises(ValueError, PositionalIndex, ["HELLO", "DOG", "JELLO"])
+
+    def test_postings(self):
+        postings = self.index.postings[5]
+        self.assertEqual(self.get_words(5, postings[0][ord("H") - ord("A")]),
+                ["HELLO", "HOLLO"])
+        self.assertEqual(self.get_words(5, postings[1][ord("E") - ord("A")]),
+                ["HELLO", "JELLO"])
+        self.assertEqual(self.get_words(5,
+            postings[0][ord("H") - ord("A")] & postings[1][ord("E") - ord("A")]), ["HELLO"])
+        self.assertEqual(postings[4][ord("Z") - ord("A")], 0)
+
+    def test_bits(self):
+        ids = [self.dic.word_ids["HOLLO"], self.dic.word_ids["HELLO"]]
+        bits_by_length = self.index.get_bits_by_length(ids)
+        self.assertEqual(self.get_words(5, bits_by_length[5]), ["HELLO", "HOLLO"])
+        self.assertEqual(bits_by_length[4], 0)
+        self.assertEqual(self.get_words(5, 0), [])
+
+    def test_blank_words(self):
+        words = ["AA", "AB", "ABC", "ABCD", "XYZ", "AAB", "BAD", "DAB", "CAB"]
+        dic = Dictionary()
+        dic.set_words(words)
+        index = dic.get_positional_index()
+
+        for letters in ["A", "AB", "ABC", "C", "XY", "ABCDXYZ"]:
+            mask = Dictionary.get_letters_mask(letters)
+            for blank_count in [1, 2]:
+                # The words with few enough letters missing, and more distinct letters
+                # than blanks.
+                expected = set(word for word in words
+                        if len(set(word) - set(letters)) <= blank_count
+                        and len(set(word)) > blank_count)
+
+                actual = set()
+                for length, bits in dic.get_blank_words(mask, blank_count).iteritems():
+                    actual.update(dic.words[word_id]
+                            for word_id in index.iter_ids(length, bits))
+                self.assertEqual(actual, expected, (letters, blank_count))
+
+        # The second time comes from the cache.
+        hits = dic.blank_words_cache.hits
+        dic.get_blank_words(Dictionary.get_letters_mask("AB"), 1)
+        self.assertEqual(dic.blank_words_cache.hits, hits + 1)
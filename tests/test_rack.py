@@ -6,7 +6,7 @@ from board import Board
 from dictionary import Dictionary
 from direction import HORIZONTAL, VERTICAL
 from solution import Solution
-from bag import generate_rack
+from bag import BLANK_SLOT, generate_rack, get_rack_counts, get_rack_indices
 import unittest
 
 
@@ -43,3 +43,13 @@ class Test_rack(unittest.TestCase):
 
         rack = generate_rack(rack, bag)
         self.assertEqual(set(rack), set(["D", "E", "F", "G"]))
+
+    def test_rack_counts(self):
+        rack = "LOL?XO?"
+        counts = get_rack_counts(rack)
+        self.assertEqual(counts[ord("L") - ord("A")], 2)
+        self.assertEqual(counts[BLANK_SLOT], 2)
+        self.assertEqual(sum(counts), len(rack))
+
+        slots = [ord("O") - ord("A"), BLANK_SLOT, ord("O") - ord("A"), BLANK_SLOT]
+        self.assertEqual(get_rack_indices(rack, slots), [1, 3, 5, 6])
@@ -5,7 +5,8 @@
 from board import Board
 from dictionary import Dictionary
 from direction import HORIZONTAL, VERTICAL
-from solution import Solution
+from solution import Solution, get_candidate_placement, get_candidate_score, \
+        get_indices, get_mask
 import unittest
 
 
@@ -98,7 +99,7 @@ class Test_score(unittest.TestCase):
         board = Board()
         solutions = []
         board.generate_solutions_in_line('?BA', dic, 7, HORIZONTAL, solutions)
-        words = set([(str(s)) for s in solutions])
+        words = set([str(Solution.from_candidate(c)) for c in solutions])
         self.assertEqual(words, set(['ABa (7,7,H)', 
             'aBA (7,7,H)', 
             'ABa (7,5,H)', 
@@ -106,5 +107,50 @@ class Test_score(unittest.TestCase):
             'ABa (7,6,H)', 
             'aBA (7,6,H)']))
 
+    def test_same_as_clone(self):
+        dic = Dictionary()
+        dic.set_words(["HELLO", "HELL", "MILO", "MILOS", "DOG", "DOGS", "GO", "SO",
+            "OS", "LO", "OH", "HO", "SH", "OD"])
+        board = Board()
+        board.add_word("MILO", Board.MID_ROW, Board.MID_COL - 1, HORIZONTAL)
+        board.add_word("DOGS", Board.MID_ROW - 1, Board.MID_COL + 2, VERTICAL, [3])
+        board.add_word("HELLO", Board.MID_ROW + 4, Board.MID_COL - 3, HORIZONTAL)
 
+        # Every placement of every word, legal or not, with and without blanks.
+        solutions = []
+        for direction in [HORIZONTAL, VERTICAL]:
+            for word in dic.words:
+                for row in range(Board.SIZE - direction.drow*(len(word) - 1)):
+                    for col in range(Board.SIZE - direction.dcol*(len(word) - 1)):
+                        if board.try_word(word, "?" * 7, row, col, direction)[0] >= 0:
+                            solutions.append(Solution(row, col, direction, word))
+                            solutions.append(Solution(row, col, direction, word, [0],
+                                range(len(word))))
+        self.assertTrue(len(solutions) > 1000)
+
+        for solution in solutions:
+            solution.determine_score(board, dic)
+            score = solution.score
+            solution.determine_score_with_clone(board, dic)
+            self.assertEqual(score, solution.score, str(solution))
+
+    def test_candidate(self):
+        self.assertEqual(get_mask([0, 3, 5]), 0b101001)
+        self.assertEqual(get_indices(0b101001), [0, 3, 5])
+        self.assertEqual(get_indices(0), [])
 
+        dic = Dictionary()
+        dic.set_words(["HELLO", "HELL", "JELLO"])
+        board = Board()
+        board.add_word("HELL", Board.MID_ROW, Board.MID_COL, HORIZONTAL)
+
+        solution = Solution(Board.MID_ROW, Board.MID_COL, HORIZONTAL, "HELLO", [4], [2])
+        candidate = solution.get_candidate()
+        self.assertEqual(candidate, (Board.MID_ROW, Board.MID_COL, HORIZONTAL, "HELLO",
+            0b10000, 0b100))
+        self.assertEqual(str(Solution.from_candidate(candidate)), str(solution))
+
+        solution.determine_score(board, dic)
+        self.assertEqual(get_candidate_score(board, dic, candidate), solution.score)
+        self.assertEqual(get_candidate_placement(board, candidate),
+                ((Board.get_index(Board.MID_ROW, Board.MID_COL + 4), "O", True),))
@@ -0,0 +1,45 @@
+#!/usr/bin/python
+
+"""Test the batch self-play runner."""
+
+from dictionary import Dictionary
+from selfplay import play_game, run_batch
+import json
+import StringIO
+import unittest
+
+class Test_selfplay(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dic = Dictionary()
+        cls.dic.set_words(["AA", "AB", "AD", "AE", "AG", "AH", "AI", "AL", "AM", "AN",
+            "AR", "AS", "AT", "AW", "AX", "AY", "BE", "DE", "DO", "ED", "EH", "EL",
+            "EM", "EN", "ER", "ES", "EX", "GO", "HE", "HI", "HO", "ID", "IN", "IS",
+            "IT", "LA", "LI", "LO", "ME", "MI", "MO", "MU", "NE", "NO", "NU", "OD",
+            "OE", "OF", "OH", "OI", "OM", "ON", "OP", "OR", "OS", "OW", "OX", "OY",
+            "PA", "PE", "PI", "RE", "SH", "SI", "SO", "TA", "TI", "TO", "UH", "UM",
+            "UN", "UP", "US", "UT", "WE", "WO", "XI", "XU", "YA", "YE", "YO"])
+
+    def test_same_seed_same_game(self):
+        first = play_game(self.dic, 3)
+        second = play_game(self.dic, 3)
+        self.assertTrue(first["turns"] > 0)
+        self.assertEqual(first["turns"], len(first["moves"]))
+        self.assertEqual(first["score"], sum(move["score"] for move in first["moves"]))
+        self.assertEqual([move["move"] for move in first["moves"]],
+                [move["move"] for move in second["moves"]])
+
+    def test_batch(self):
+        serial = StringIO.StringIO()
+        games, turns, elapsed = run_batch(self.dic, 3, 10, 1, "subsets", serial)
+        self.assertEqual(games, 3)
+
+        parallel = StringIO.StringIO()
+        run_batch(self.dic, 3, 10, 2, "subsets", parallel)
+
+        serial_games = [json.loads(line) for line in serial.getvalue().splitlines()]
+        parallel_games = [json.loads(line) for line in parallel.getvalue().splitlines()]
+        self.assertEqual([game["seed"] for game in serial_games], [10, 11, 12])
+        self.assertEqual(sum(game["turns"] for game in serial_games), turns)
+        self.assertEqual([[move["move"] for move in game["moves"]] for game in serial_games],
+                [[move["move"] for move in game["moves"]] for game in parallel_games])